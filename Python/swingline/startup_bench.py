@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" Swingline startup benchmark - import time of module swingline
+
+Runs "import swingline" in a new interpreter, best of RUNS, less the start
+time of an empty interpreter, and fails (exit 1) over IMPORT_BUDGET_MS or if
+an exporter or database module was imported with it.
+
+    python3 startup_bench.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+
+## Import time budget of module swingline in milliseconds - measured ~80 ms
+##  (stdlib, scsi_t10 and the PAT_EVENT regexes), ~340 ms when dataset,
+##  sqlalchemy and xlsxwriter were imported with the module
+IMPORT_BUDGET_MS = 150
+
+## Interpreter starts per measurement - the best one is kept
+RUNS = 7
+
+## Modules imported by a Session or an exporter, never by the module
+LAZY_MODULES = ('dataset', 'sqlalchemy', 'alembic', 'xlsxwriter')
+
+
+def time_python(code, runs):
+    """ TIME PYTHON function """
+    ## Best wall time of a new interpreter running code, in milliseconds
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    """ MAIN function """
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+
+    baseline = time_python('pass', runs)
+    import_ms = time_python('import swingline', runs) - baseline
+    print('import swingline {ms:.1f} ms - budget {budget} ms, interpreter {base:.1f} ms'.format(
+        ms=import_ms, budget=IMPORT_BUDGET_MS, base=baseline))
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import swingline  # noqa: F401
+    lazy_list = [module for module in LAZY_MODULES if module in sys.modules]
+    if lazy_list:
+        print('imported with swingline {modules} - should load on first use'.format(modules=', '.join(lazy_list)))
+
+    if import_ms > IMPORT_BUDGET_MS or lazy_list:
+        print('FAILED')
+        sys.exit(1)
+    print('OK')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,33 +3,131 @@
 """ Swingline:  investigating ESXi entire cluster's block storage events using
 Microsoft Excel spreadsheets with preconfigured autofilters and heatmaps """
 import argparse
+import calendar
+import collections
+import contextvars
+import csv
+import functools
 import gzip
+import hashlib
+import importlib
+import json
 import logging
+import mmap
+import multiprocessing
 import os
+import queue
 import re
 import shutil
+import subprocess
 import sys
+import tarfile
+import threading
 import time
+import zlib
 from logging.handlers import SysLogHandler
 
-import dataset
-import xlsxwriter
+import scsi_t10
 
 ## GLOBAL
 
 __version__ = "0.0.74"
 
-## Setup database instance from module dataset
-## Create a new database in memory - sqllite is inlcuded in dataset
-DB = dataset.connect('sqlite:///:memory:')
-## Create a new database tables for storage latency and io command failures
-TBL_STORAGE = DB.get_table('storage')
+## Dictionary encoded columns of table storage - each distinct string is
+##  stored once in table dim_<column>, storage holds its integer id
+##  view storage_view joins them back under the same column names
+DIM_FIELDS = ('host', 'fname', 'dev', 'dsname', 't10', 'sense', 'asense')
+
+## Columns of table storage, declared up front by create_db - every event row
+##  is written with all of them.  Latencies are integer microseconds and tstamp
+##  is integer epoch microseconds, date/hour/time text is kept for reports.
+##  DIM_FIELDS columns are integer ids.  Types are sqlalchemy type names,
+##  looked up by create_db (sqlalchemy is not imported until a session opens)
+STORAGE_SCHEMA = (('category', 'UnicodeText'), ('tstamp', 'BigInteger'), ('date', 'UnicodeText'),
+                  ('hour', 'UnicodeText'), ('time', 'UnicodeText'), ('host', 'Integer'), ('fname', 'Integer'),
+                  ('dev', 'Integer'), ('dsname', 'Integer'), ('latency', 'Integer'), ('lavg', 'Integer'),
+                  ('world', 'UnicodeText'), ('cmd', 'UnicodeText'), ('t10', 'Integer'), ('sense', 'Integer'),
+                  ('asense', 'Integer'), ('raw', 'UnicodeText'), ('fprint', 'BigInteger'))
+STORAGE_COLUMNS = tuple(col for col, col_type in STORAGE_SCHEMA)
+
+## Schema of table storage_raw - raw lines zlib compressed, by fingerprint
+##  used with option --raw_store zlib, storage.raw is NULL for those rows
+RAW_SCHEMA = (('fprint', 'BigInteger'), ('zraw', 'LargeBinary'))
+RAW_COLUMNS = tuple(col for col, col_type in RAW_SCHEMA)
+
+## Report field of the raw line per option --raw_store - zlib lines are
+##  inflated by SQL function inflate_raw only for the rows exported
+RAW_FIELD = {'text': 'raw',
+             'zlib': '(SELECT inflate_raw(zraw) FROM storage_raw WHERE storage_raw.fprint=storage_view.fprint) AS raw'}
+
+## Unique index of table storage, created by create_db before ingest
+##  one event per fingerprint (host, raw line) - see hash_event
+STORAGE_UNIQUE = ('fprint',)
+
+## Indexes of table storage, created by index_db after ingest
+##  report queries filter by category and sort by tstamp,host
+STORAGE_INDEX = (('tstamp', 'host'), ('category', 'tstamp', 'host'))
+
+## Top Ten Summary fields per category, in report order - counted by
+##  count_top_ten as events are stored instead of one GROUP BY per field
+SUMMARY_FIELDS = collections.OrderedDict((
+    ('iofails', ('date', 'hour', 'host', 'fname', 'dev', 'dsname', 'world', 'cmd', 't10', 'sense')),
+    ('sioclmt', ('date', 'hour', 'host', 'fname', 'dev', 'dsname', 'world', 'cmd', 't10')),
+    ('latency', ('date', 'hour', 'host', 'fname', 'dev', 'dsname', 'world')),
+    ('apdpdls', ('date', 'hour', 'host', 'fname', 'dev', 'dsname'))))
+
+## Excel worksheet row limit - incl. the header row
+XLSX_ROW_MAX = 1048576
+
+## Compressed log read size - decompressed and scanned one block at a time
+READ_BLOCK = 1 << 20
+
+## Child process decompressors per option --inflate - each writes the
+##  decompressed gzip file named last to its stdout, and dies on SIGPIPE
+##  (like pigz) when the reader stops early
+INFLATE_CMD = {'zlib': [sys.executable, '-c', 'import gzip, shutil, signal, sys; '
+                                              'signal.signal(signal.SIGPIPE, signal.SIG_DFL); '
+                                              'shutil.copyfileobj(gzip.open(sys.argv[1]), sys.stdout.buffer, 1 << 20)'],
+               'pigz': ['pigz', '-d', '-c']}
+
+## Report exporters per format of option --export, in export order - freeze
+##  function (opens the writer of the format, see freeze_rows) and the modules
+##  it needs, imported by load_exporter only when the format is exported
+EXPORTERS = collections.OrderedDict((('csv', ('freeze_csv', ())),
+                                     ('json', ('freeze_json', ())),
+                                     ('summary', ('freeze_summary', ())),
+                                     ('xlsx', ('freeze_xlsx', ('xlsxwriter',)))))
+
+## Ingest pipeline queue size per parser (option --jobs) - tasks queued
+##  ahead of the parsers and results held for the writer
+PIPE_DEPTH = 4
+
+## Parse cache layout of the classified events - part of every cache key
+##  with the swingline version, changed when the cached event dict changes
+CACHE_FORMAT = 2
+
+## Epoch seconds per log date - few distinct dates, many events per date
+EPOCH_DATE = {}
 
 ## Create a new instance named USAGE_TRACKING - separate from root and customize
 USAGE_TRACKING = logging.getLogger('USAGE_TRACKING')
 
+## Runtime logger of the running Session - the RUNTIME_LOG logger unless a
+##  Session sets its own, for the calls it makes (incl. their threads and
+##  worker processes)
+SESSION_LOG = contextvars.ContextVar('SESSION_LOG', default=logging.getLogger('RUNTIME_LOG'))
+
+
+class SessionLog:
+    """ SESSION LOG class """
+    ## Passes each call (RUNTIME_LOG.info, ...) to the SESSION_LOG logger
+
+    def __getattr__(self, name):
+        return getattr(SESSION_LOG.get(), name)
+
+
 ## Create a new instance named RUNTIME_LOG - separate from root and customize
-RUNTIME_LOG = logging.getLogger('RUNTIME_LOG')
+RUNTIME_LOG = SessionLog()
 
 ## Setup logging to flexibly handle script progress notices and exceptions from
 ## module logging.  Create logging message and date format instance for common
@@ -38,79 +136,279 @@ FMT_LOG_DEFAULT = logging.Formatter(
     '%(asctime)s.%(msecs)03d PID%(process)d:%(levelname)-8s:%(filename)s:%(funcName)-15s:%(message)s',
     '%Y-%m-%dT%H:%M:%S')
 
-## Create remote sylog destination - incl. for system logging
-LOCALHOST = SysLogHandler(address=('localhost', 514))
-LOCALHOST.setFormatter(FMT_LOG_DEFAULT)
-
-## Create STDERR logging destination - incl. for BRB and development
-CONSOLE = logging.StreamHandler()
-CONSOLE.setFormatter(FMT_LOG_DEFAULT)
+## Logging destinations of the command line by name (console, syslog) -
+##  created by set_runtime_log and set_runtime_syslog, none at import
+LOG_HANDLER = {}
+
+## Compile the event patterns once - insert_rec runs for every log line
+##  prefilter: literals, one is in every event line (checked before any regex)
+##  datetime: ESXi log timestamp prefix
+##  apdpdls, iofails, latency, sioclmt: one regex per category, named groups
+##   hold the event fields (dev, cmd, world, sense, asense, latency, lavg)
+##  iosmart, dupvobd: exclusions for S.M.A.R.T. polling and vobd duplicates
+PAT_EVENT = {'prefilter': ('ScsiDevice', 'performance has deteriorated'),
+             'datetime': re.compile(r'[0-9]{4}-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]\.[0-9]{3}Z'),
+             'apdpdls': re.compile(r'ScsiDevice.* Device (?P<dev>.*?) APD Notify PERM LOSS; token num:[0-9]+'),
+             'iofails': re.compile(
+                 r'ScsiDeviceIO\: [0-9]+\: Cmd\(0x[0-9a-fA-F]+\) (?P<cmd>0x[0-9a-fA-F][0-9a-fA-F]), CmdSN 0x[0-9a-fA-F]+ from world (?P<world>[0-9]+) to dev (?P<dev>.*?) failed (?P<asense>(?P<sense>.*?)(?: (?:Possible|Valid).*?)? sense data: .*?)\.?$'),
+             'iosmart': re.compile(r' Cmd\(0x[0-9a-fA-F]+\) 0x(1a|4d|85), '),
+             'latency': re.compile(
+                 r'^(?:.* Device )?(?P<dev>.*?) performance has deteriorated(?:.* value of (?P<lavg>[0-9]+) microseconds to (?P<latency>[^ ]*))?'),
+             'dupvobd': re.compile(r'vob.scsi.device.io.latency.high'),
+             'sioclmt': re.compile(
+                 r'ScsiDeviceIO.* Restricting cmd (?P<cmd>.*?)(?: \([0-9]+ bytes\).*)? from WID (?P<world>[0-9]+) to quiesced dev (?P<dev>.*?)(?::[0-9]+ \(vmkCmd=0x.*)?$')}
+
+## Log timestamp prefix as bytes - per-file first/last timestamps and the
+##  --since/--until binary search read it without decoding lines
+PAT_TSTAMP = re.compile(PAT_EVENT['datetime'].pattern.encode('ascii'))
+
+## Time window bounds - a partial --since/--until datetime is completed
+##  from these (start or end of the day, hour, minute...)
+WINDOW_PAD = {'since': '0000-01-01T00:00:00.000Z', 'until': '9999-12-31T23:59:59.999Z'}
+
+## vm-support bundle file names - see find_bundles and read_archive
+##  member patterns limit .tgz members to the directories of the bundle layout
+PAT_FILE = {'dns': re.compile(r'^uname_-a.txt'),
+            'txt': re.compile(r'^(vmkernel|vobd)(\.log|\.[0-9]+(?!\.gz))'),
+            'gz': re.compile(r'^(vmkernel|vobd)\.[0-9]+\.gz'),
+            'vmfs': re.compile(r'^localcli_storage-vmfs-extent-list.txt'),
+            'tgz': re.compile(r'\.(tgz|tar\.gz)$'),
+            'esx': re.compile(r'^esx-'),
+            'member': {'dns': re.compile(r'(^|/)commands$'),
+                       'vmfs': re.compile(r'(^|/)commands$'),
+                       'txt': re.compile(r'(^|/)var/run/log$'),
+                       'gz': re.compile(r'(^|/)var/run/log$')}}
+
+## vm-support bundle layout - the only directories of an extracted bundle
+##  listed by list_bundle, with the file kinds each one holds
+BUNDLE_LAYOUT = (('commands', ('dns', 'vmfs')),
+                 (os.path.join('var', 'run', 'log'), ('txt', 'gz')))
+
+## Byte pattern of PAT_EVENT['prefilter'] - searched in undecoded log buffers
+PAT_PREFILTER = re.compile(b'|'.join(re.escape(literal.encode('utf-8')) for literal in PAT_EVENT['prefilter']))
 
 
 ## function main
 def main():
     """ MAIN function """
 
-    set_usage_tracking()
     set_runtime_log()
     opt_dict = parse_opt()
 
+    ## Syslog destinations only once the options are known - none for
+    ##  --version, --help or invalid options
+    set_runtime_syslog(opt_dict)
+    set_usage_tracking()
+
     # Log how Swingline was called for usage metrics
     track_use('start')
 
-    ## Create four database entries (one per category) from 1970-01-01 with KBs
-    insert_sample()
-
-    ## Call function pop_db - populates database
-    pop_db(opt_dict['srdata'])
+    ## One Session per run - store, sample events and report queries
+    session = Session(opt_dict)
 
-    ## Call function check_db for results compare
+    ## Populate the database from option --bundle_dir
     ##  ex. log review shows 20 events and db contains four samples
-    check_db()
-
-    ## Create a dictionary of standard SQL queries
-    cat_dict = dict(storage='date,time,category,host,fname,dev,dsname,latency,lavg,world,cmd,t10,sense,asense,raw',
-                    latency='date,time,host,fname,dev,dsname,world,latency,lavg,raw',
-                    iofails='date,time,host,fname,dev,dsname,world,cmd,t10,sense,raw',
-                    sioclmt='date,time,host,fname,dev,dsname,world,cmd,t10,raw',
-                    apdpdls='date,time,host,fname,dev,dsname,raw',
-                    order='date,time,host')
-
-    sql_dict = dict(storage='SELECT DISTINCT {fields} FROM {table} ORDER BY {order}'.format(table='storage',
-                                                                                            fields=cat_dict['storage'],
-                                                                                            order=cat_dict['order']),
-                    latency='SELECT DISTINCT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
-                        table='storage', fields=cat_dict['latency'], cat='latency', order=cat_dict['order']),
-                    iofails='SELECT DISTINCT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
-                        table='storage', fields=cat_dict['iofails'], cat='iofails', order=cat_dict['order']),
-                    sioclmt='SELECT DISTINCT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
-                        table='storage', fields=cat_dict['sioclmt'], cat='sioclmt', order=cat_dict['order']),
-                    apdpdls='SELECT DISTINCT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
-                        table='storage', fields=cat_dict['apdpdls'], cat='apdpdls', order=cat_dict['order']))
+    if not session.ingest():
+        sys.exit(1)
 
     ## Generate results formats specified from command line options
-    if opt_dict['csv_bool']:
-        ## Call function freeze_tbl from module swingline to generate CSV
-        freeze_tbl({'format': 'csv', 'freeze_file': opt_dict['csv_file'], 'sql_query': sql_dict['storage']})
-    if opt_dict['json_bool']:
-        ## Call function freeze_tbl from module swingline to generate JSON
-        freeze_tbl({'format': 'json', 'freeze_file': opt_dict['json_file'], 'sql_query': sql_dict['storage']})
-    if opt_dict['summary_bool']:
-        ## Call function to generate Top Ten Summary - before XLSX
-        freeze_summary({'opt_dict': opt_dict, 'sql_dict': sql_dict})
-    if opt_dict['xlsx_bool']:
-        ## Call function opt_dict['xlsx'] to generate XLSX - after Summary
-        freeze_xlsx({'opt_dict': opt_dict, 'sql_query': sql_dict['storage']})
+    session.export()
+    session.close()
 
     milton_waddams()
     track_use('stop')
     sys.exit(0)
 
 
+def session_log(method):
+    """ SESSION LOG decorator """
+    ## Run a Session method with RUNTIME_LOG logging to the session logger
+    @functools.wraps(method)
+    def run_method(self, *args, **kwargs):
+        token = SESSION_LOG.set(self.log)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            SESSION_LOG.reset(token)
+
+    return run_method
+
+
+class Session:
+    """ SESSION class """
+    ## One swingline analysis - its options, database store, Top Ten counts
+    ##  and logger, nothing kept in module globals
+    ##  session = Session({'jobs': 4}, log=logging.getLogger('triage'))
+    ##  session.ingest(['/data/case1']), session.query('iofails'),
+    ##  session.export(['xlsx']), session.close()
+    ## Options default to set_opt_default - command line validation is done
+    ##  by parse_opt only.  Use a session from the thread that created it
+    ##  (the memory database is per thread), one session per analysis, with
+    ##  its own report files or tmp_dir.
+
+    def __init__(self, opt_dict=None, log=None):
+        self.log = log if log else logging.getLogger('RUNTIME_LOG')
+        self.opt_dict = set_opt_default()
+        self.opt_dict.update(opt_dict if opt_dict else {})
+        self.cat_dict, self.sql_dict = set_sql(self.opt_dict)
+        self.stat_dict = set_stat()
+        self.store = None
+        self.open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @session_log
+    def open(self):
+        """ SESSION OPEN method """
+        ## Call function connect_db - memory, or disk-backed for option --db
+        self.store = connect_db(self.opt_dict)
+
+        ## Create the storage table columns with their types before any insert
+        create_db(self.store, self.opt_dict)
+
+        ## Create four database entries (one per category) from 1970-01-01 with KBs
+        insert_sample(self.store, self.opt_dict)
+
+    @session_log
+    def ingest(self, path_list=None):
+        """ SESSION INGEST method """
+        ## Populate the database from vm-support bundles (directories or
+        ##  .tgz archives) - option --bundle_dir if none are given
+        ## Returns False if no event was captured
+        pop_db(self.store, self.opt_dict, self.stat_dict, path_list if path_list else [self.opt_dict['srdata']])
+
+        ## Call function decode_db - T10 sense names, once per distinct code
+        decode_db(self.store, self.stat_dict)
+
+        ## Call function check_db for results compare
+        captured = check_db(self.store)
+
+        ## Call function index_db - indexes for report queries, after all inserts
+        index_db(self.store)
+
+        return captured
+
+    @session_log
+    def query(self, sql_query='storage'):
+        """ SESSION QUERY method """
+        ## Rows of a report query (storage or a category, see set_sql) or of
+        ##  any SQL - table storage_view holds the events
+        sql_query = self.sql_dict.get(sql_query, sql_query)
+        explain_query(self.store, sql_query)
+
+        return list(self.store['db'].query(sql_query))
+
+    @session_log
+    def export(self, format_list=None):
+        """ SESSION EXPORT method """
+        ## Write report files - the formats of option --export unless given
+        ##  (csv, json, summary, xlsx), returns the report file names
+        if format_list is None:
+            format_list = [fmt for fmt in EXPORTERS if self.opt_dict[fmt + '_bool']]
+
+        ## Log the query plan of the report query - debug only
+        explain_query(self.store, self.sql_dict['storage'])
+
+        ## Top Ten Summary model - for the text file and the XLSX summary sheet
+        freeze_setup = {'store': self.store, 'opt_dict': self.opt_dict, 'cat_dict': self.cat_dict,
+                        'summary': summary_model(self.stat_dict) if 'summary' in format_list else None}
+
+        ## Open the writer of each format, in EXPORTERS order, then stream
+        ##  the storage rows to all of them at once - one query pass
+        writer_list = []
+        for fmt in EXPORTERS:
+            if fmt not in format_list:
+                continue
+            freeze_func = load_exporter(fmt)
+            if freeze_func:
+                writer_list.append(freeze_func(freeze_setup))
+        freeze_rows(self.store, self.sql_dict['storage'], writer_list)
+
+        file_list = []
+        for writer in writer_list:
+            writer['close'](writer)
+            file_list.append(writer['file'])
+
+        return file_list
+
+    def close(self):
+        """ SESSION CLOSE method """
+        ## Close the database connections - a memory database is gone, the
+        ##  session is unusable after
+        if self.store:
+            self.store['db'].engine.dispose()
+            self.store = None
+
+
+def load_exporter(fmt):
+    """ LOAD EXPORTER function """
+    ## Freeze function of a report format - imports the modules it needs on
+    ##  first use, returns None if one is not installed (format skipped)
+    func_name, module_list = EXPORTERS[fmt]
+    for module_name in module_list:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            RUNTIME_LOG.error('Failed loading {fmt} exporter - module "{module}" not installed'.format(
+                fmt=fmt, module=module_name))
+            return None
+
+    return globals()[func_name]
+
+
+def set_sql(opt_dict):
+    """ SET SQL function """
+    ## Create a dictionary of standard SQL queries
+    ##  apdpdls events have no latency value - report them as APD/PDL
+    ##  raw lines are read as stored, see RAW_FIELD
+    raw_field = RAW_FIELD[opt_dict['raw_store']]
+    cat_dict = dict(storage='date,time,category,host,fname,dev,dsname,CASE WHEN category=\'apdpdls\' THEN \'APD/PDL\' ELSE latency END AS latency,lavg,world,cmd,t10,sense,asense,{raw}'.format(raw=raw_field),
+                    latency='date,time,host,fname,dev,dsname,world,latency,lavg,{raw}'.format(raw=raw_field),
+                    iofails='date,time,host,fname,dev,dsname,world,cmd,t10,sense,{raw}'.format(raw=raw_field),
+                    sioclmt='date,time,host,fname,dev,dsname,world,cmd,t10,{raw}'.format(raw=raw_field),
+                    apdpdls='date,time,host,fname,dev,dsname,{raw}'.format(raw=raw_field),
+                    order='tstamp,host')
+
+    ## Duplicate events are never stored (see dedup_list) - no DISTINCT
+    ## Queries read view storage_view - storage with DIM_FIELDS decoded
+    sql_dict = dict(storage='SELECT {fields} FROM {table} ORDER BY {order}'.format(table='storage_view',
+                                                                                   fields=cat_dict['storage'],
+                                                                                   order=cat_dict['order']),
+                    latency='SELECT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
+                        table='storage_view', fields=cat_dict['latency'], cat='latency', order=cat_dict['order']),
+                    iofails='SELECT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
+                        table='storage_view', fields=cat_dict['iofails'], cat='iofails', order=cat_dict['order']),
+                    sioclmt='SELECT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
+                        table='storage_view', fields=cat_dict['sioclmt'], cat='sioclmt', order=cat_dict['order']),
+                    apdpdls='SELECT {fields} FROM {table} WHERE category=\'{cat}\' ORDER BY {order}'.format(
+                        table='storage_view', fields=cat_dict['apdpdls'], cat='apdpdls', order=cat_dict['order']))
+
+    return cat_dict, sql_dict
+
+
+def set_stat():
+    """ SET STAT function """
+    ## Ingest statistics of a session - parse cache use, event fingerprints
+    ##  and duplicates per host, Top Ten counts per category and field
+    return {'cache_hit': 0, 'cache_miss': 0, 'fprint': set(), 'dup_host': collections.Counter(),
+            'top_ten': dict((cat, dict((field, collections.Counter()) for field in fields)) for cat, fields in
+                            SUMMARY_FIELDS.items())}
+
+
 def set_usage_tracking():
     """ SET USAGE TRACKING function """
     ## Create remote syslog destination - incl. for GS Tools Usage Tracking, vDiag
-    vrli_usage = SysLogHandler(address=('usage.gsstools.vmware.com', 514))
+    ##  the host name is resolved here, usage is not tracked if it fails
+    try:
+        vrli_usage = SysLogHandler(address=('usage.gsstools.vmware.com', 514))
+    except OSError:
+        RUNTIME_LOG.debug('Failed usage tracking destination "{host}" - not tracked'.format(
+            host='usage.gsstools.vmware.com'))
+        return
     vrli_usage.setFormatter(FMT_LOG_DEFAULT)
 
     ## Modify RUNTIME_LOG to use both syslog and CONSOLE logging
@@ -121,13 +419,30 @@ def set_usage_tracking():
 
 def set_runtime_log():
     """ SET RUNTIME LOG function """
-    ## Modify RUNTIME_LOG to use both syslog and CONSOLE logging
-    RUNTIME_LOG.addHandler(LOCALHOST)
-    RUNTIME_LOG.addHandler(CONSOLE)
+    ## Create STDERR logging destination - incl. for BRB and development
+    ##  syslog is added by set_runtime_syslog, after the options are parsed
+    LOG_HANDLER['console'] = logging.StreamHandler()
+    LOG_HANDLER['console'].setFormatter(FMT_LOG_DEFAULT)
+    RUNTIME_LOG.addHandler(LOG_HANDLER['console'])
     ## Explicitly set minimum logging level INFO
     RUNTIME_LOG.setLevel(logging.INFO)
 
 
+def set_runtime_syslog(opt_dict):
+    """ SET RUNTIME SYSLOG function """
+    ## Create localhost syslog destination - incl. for system logging
+    ##  not with options --debug or --log_dir (see parse_opt_logging)
+    if not opt_dict['syslog']:
+        return
+    try:
+        LOG_HANDLER['syslog'] = SysLogHandler(address=('localhost', 514))
+    except OSError:
+        RUNTIME_LOG.warning('Failed syslog destination "{host}" - not logged'.format(host='localhost'))
+        return
+    LOG_HANDLER['syslog'].setFormatter(FMT_LOG_DEFAULT)
+    RUNTIME_LOG.addHandler(LOG_HANDLER['syslog'])
+
+
 def set_opt_default():
     """ SET OPT DEFAULT function """
     ## Setup command line options defaults
@@ -138,7 +453,16 @@ def set_opt_default():
                 'csv_bool': False,
                 'json_bool': False,
                 'xlsx_bool': True,
-                'summary_bool': True}
+                'summary_bool': True,
+                'jobs': 1,
+                'flush_size': 5000,
+                'db_file': '',
+                'cache_mb': 256,
+                'cache_dir': '',
+                'raw_store': 'text',
+                'inflate': 'main',
+                'window': None,
+                'syslog': True}
 
     opt_dict.update(
         {'csv_file': '{dirpath}/swingline{unique}.csv'.format(dirpath=opt_dict['srdata'], unique=opt_dict['tstamp']),
@@ -169,7 +493,7 @@ def set_parser(opt_dict):
                         const='default',
                         action='store',
                         dest='bundle_dir',
-                        help=': vm-support bundle extracted directory - default is "{dir}"'.format(
+                        help=': vm-support bundle extracted directory or .tgz archive - default is "{dir}"'.format(
                             dir=opt_dict['srdata']))
     parser.add_argument('-r', '--rpt_dir',
                         nargs='?',
@@ -193,6 +517,77 @@ def set_parser(opt_dict):
                         action='store',
                         dest='log_dir',
                         help=': log to file in directory - default is console')
+    parser.add_argument('-j', '--jobs',
+                        nargs='?',
+                        default=opt_dict['jobs'],
+                        const=0,
+                        type=int,
+                        action='store',
+                        dest='jobs',
+                        help=': parse logs in N worker processes - 0 is one per CPU, default is {jobs}'.format(
+                            jobs=opt_dict['jobs']))
+    parser.add_argument('-f', '--flush_size',
+                        nargs='?',
+                        default=opt_dict['flush_size'],
+                        const=opt_dict['flush_size'],
+                        type=int,
+                        action='store',
+                        dest='flush_size',
+                        help=': write events to the database in batches of N records - default is {size}'.format(
+                            size=opt_dict['flush_size']))
+    parser.add_argument('-g', '--inflate',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='inflate',
+                        help=': decompress gzip logs in "main" (this process), or in "zlib" or "pigz" child processes - default is {inflate}'.format(
+                            inflate=opt_dict['inflate']))
+    parser.add_argument('-d', '--db',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='db_file',
+                        help=': store events in SQLite database file (replaced each run) - default is memory')
+    parser.add_argument('-c', '--cache_mb',
+                        nargs='?',
+                        default=opt_dict['cache_mb'],
+                        const=opt_dict['cache_mb'],
+                        type=int,
+                        action='store',
+                        dest='cache_mb',
+                        help=': database file page cache and memory map budget in MB - default is {size}'.format(
+                            size=opt_dict['cache_mb']))
+    parser.add_argument('-p', '--cache_dir',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='cache_dir',
+                        help=': reuse events parsed from unchanged log files, cached in directory - default is none')
+    parser.add_argument('-z', '--raw_store',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='raw_store',
+                        help=': store raw log lines as "text" or "zlib" (compressed side table) - default is {store}'.format(
+                            store=opt_dict['raw_store']))
+    parser.add_argument('-a', '--since',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='since',
+                        help=': only events at or after UTC datetime YYYY-MM-DD[THH[:MM[:SS[.mmm]]]] - default is all')
+    parser.add_argument('-u', '--until',
+                        nargs='?',
+                        default='default',
+                        const='default',
+                        action='store',
+                        dest='until',
+                        help=': only events at or before UTC datetime YYYY-MM-DD[THH[:MM[:SS[.mmm]]]] - default is all')
     parser.add_argument('-v', '--debug',
                         action='store_true',
                         dest='debug',
@@ -261,6 +656,9 @@ def parse_opt():
     opt_dict = parse_opt_bundle(arg_dict, opt_dict)
     opt_dict = parse_opt_temp(arg_dict, opt_dict)
     opt_dict = parse_opt_export(arg_dict, opt_dict)
+    opt_dict = parse_opt_ingest(arg_dict, opt_dict)
+    opt_dict = parse_opt_window(arg_dict, opt_dict)
+    opt_dict = parse_opt_db(arg_dict, opt_dict)
     opt_dict = parse_opt_logging(arg_dict, opt_dict)
 
     return opt_dict
@@ -305,6 +703,95 @@ def parse_opt_temp(arg_dict, opt_dict):
     return opt_dict
 
 
+def parse_opt_ingest(arg_dict, opt_dict):
+    """ PARSE OPT INGEST function """
+    if arg_dict.jobs == 0:
+        opt_dict['jobs'] = multiprocessing.cpu_count()
+    elif arg_dict.jobs > 0:
+        opt_dict['jobs'] = arg_dict.jobs
+    else:
+        RUNTIME_LOG.warning('Invalid jobs arguement "{arg}" - using default'.format(arg=arg_dict.jobs))
+
+    if arg_dict.flush_size > 0:
+        opt_dict['flush_size'] = arg_dict.flush_size
+    else:
+        RUNTIME_LOG.warning('Invalid flush size arguement "{arg}" - using default'.format(arg=arg_dict.flush_size))
+
+    ## pigz is used if found on PATH - else the zlib child processes
+    if arg_dict.inflate and not 'default' in arg_dict.inflate:
+        if arg_dict.inflate.lower() in ('main',) + tuple(INFLATE_CMD):
+            opt_dict['inflate'] = arg_dict.inflate.lower()
+        else:
+            RUNTIME_LOG.warning('Invalid inflate arguement "{arg}" - using default'.format(arg=arg_dict.inflate))
+    if opt_dict['inflate'] == 'pigz' and not shutil.which(INFLATE_CMD['pigz'][0]):
+        RUNTIME_LOG.warning('Missing decompressor "{cmd}" - using zlib'.format(cmd=INFLATE_CMD['pigz'][0]))
+        opt_dict['inflate'] = 'zlib'
+
+    return opt_dict
+
+
+def parse_opt_window(arg_dict, opt_dict):
+    """ PARSE OPT WINDOW function """
+    ## Time window as two log timestamp prefixes (YYYY-MM-DDTHH:MM:SS.mmmZ)
+    ##  - compared as text, the same as comparing the times
+    window = dict(WINDOW_PAD)
+    for key, arg in (('since', arg_dict.since), ('until', arg_dict.until)):
+        if not arg or 'default' in arg:
+            continue
+        arg_txt = arg.strip().upper().replace(' ', 'T').rstrip('Z')
+        ## Check the layout, then the values (month 13, hour 25...)
+        valid = bool(re.match(r'^[0-9]{4}-[0-9][0-9]-[0-9][0-9](T[0-9][0-9](:[0-9][0-9](:[0-9][0-9](\.[0-9]{3})?)?)?)?$',
+                              arg_txt))
+        if valid:
+            try:
+                time.strptime(arg_txt[0:19], {10: '%Y-%m-%d', 13: '%Y-%m-%dT%H', 16: '%Y-%m-%dT%H:%M',
+                                              19: '%Y-%m-%dT%H:%M:%S'}[len(arg_txt[0:19])])
+            except ValueError:
+                valid = False
+        if valid:
+            window[key] = arg_txt + WINDOW_PAD[key][len(arg_txt):]
+        else:
+            RUNTIME_LOG.warning('Invalid {key} datetime arguement "{arg}" - using default'.format(key=key, arg=arg))
+
+    if window != WINDOW_PAD:
+        if window['since'] > window['until']:
+            RUNTIME_LOG.error('Invalid time window - since "{since}" is after until "{until}"'.format(**window))
+            sys.exit(1)
+        opt_dict['window'] = (window['since'], window['until'])
+        RUNTIME_LOG.debug('Time window - since "{since}", until "{until}"'.format(**window))
+
+    return opt_dict
+
+
+def parse_opt_db(arg_dict, opt_dict):
+    """ PARSE OPT DB function """
+    if arg_dict.db_file and not 'default' in arg_dict.db_file:
+        if os.path.isdir(os.path.dirname(os.path.abspath(arg_dict.db_file))):
+            opt_dict['db_file'] = os.path.abspath(arg_dict.db_file)
+        else:
+            RUNTIME_LOG.warning('Invalid database file arguement "{arg}" - using memory'.format(arg=arg_dict.db_file))
+
+    if arg_dict.cache_dir and not 'default' in arg_dict.cache_dir:
+        if os.path.isdir(arg_dict.cache_dir):
+            opt_dict['cache_dir'] = os.path.abspath(arg_dict.cache_dir)
+        else:
+            RUNTIME_LOG.warning('Invalid parse cache directory arguement "{arg}" - using none'.format(
+                arg=arg_dict.cache_dir))
+
+    if arg_dict.cache_mb > 0:
+        opt_dict['cache_mb'] = arg_dict.cache_mb
+    else:
+        RUNTIME_LOG.warning('Invalid cache arguement "{arg}" - using default'.format(arg=arg_dict.cache_mb))
+
+    if arg_dict.raw_store and not 'default' in arg_dict.raw_store:
+        if arg_dict.raw_store.lower() in RAW_FIELD:
+            opt_dict['raw_store'] = arg_dict.raw_store.lower()
+        else:
+            RUNTIME_LOG.warning('Invalid raw store arguement "{arg}" - using default'.format(arg=arg_dict.raw_store))
+
+    return opt_dict
+
+
 def parse_opt_logging(arg_dict, opt_dict):
     """ PARSE OPT LOGGING function """
     if arg_dict.log_dir and not 'default' in arg_dict.log_dir:
@@ -320,8 +807,8 @@ def parse_opt_logging(arg_dict, opt_dict):
                 utc=True)
             logfile_vdiag.setFormatter(FMT_LOG_DEFAULT)
             RUNTIME_LOG.addHandler(logfile_vdiag)
-            RUNTIME_LOG.removeHandler(CONSOLE)
-            RUNTIME_LOG.removeHandler(LOCALHOST)
+            RUNTIME_LOG.removeHandler(LOG_HANDLER.get('console'))
+            opt_dict['syslog'] = False
             RUNTIME_LOG.setLevel(logging.DEBUG)
             RUNTIME_LOG.debug(
                 'vDiag environment variable VDIAG_LOGDIR overrides defaults - new log file path "{path}"'.format(
@@ -332,10 +819,10 @@ def parse_opt_logging(arg_dict, opt_dict):
                     arg=arg_dict.bundle_dir))
 
     if arg_dict.debug:
-        RUNTIME_LOG.removeHandler(LOCALHOST)
+        opt_dict['syslog'] = False
         RUNTIME_LOG.setLevel(logging.DEBUG)
     if arg_dict.silent:
-        RUNTIME_LOG.removeHandler(CONSOLE)
+        RUNTIME_LOG.removeHandler(LOG_HANDLER.get('console'))
     if arg_dict.quiet:
         RUNTIME_LOG.setLevel(logging.WARNING)
 
@@ -360,118 +847,567 @@ def track_use(status):
         RUNTIME_LOG.info('Swingline Complete')
 
 
-def insert_sample():
+def connect_db(opt_dict):
+    """ CONNECT DATABASE function """
+    ## Database store of a session - the dataset database, its tables and
+    ##  the dimension ids per column and value (assigned by encode_dim in
+    ##  insert order)
+    ##  raw - table of compressed raw lines, option --raw_store zlib
+    ##  sense_t10 - T10 sense name per code decoded by decode_db
+    ## dataset (and sqlalchemy) are imported by the first session, not with
+    ##  the module
+    import dataset
+    from sqlalchemy import event
+
+    store = {'db': None, 'storage': None, 'raw': None, 'dim': {},
+             'dim_id': dict((field, {}) for field in DIM_FIELDS), 'sense_t10': {}}
+
+    if not opt_dict['db_file']:
+        ## Create a new database in memory - sqllite is inlcuded in dataset
+        store['db'] = dataset.connect('sqlite:///:memory:')
+        store['storage'] = store['db'].get_table('storage')
+        return store
+
+    ## Each run starts from an empty storage table
+    if os.path.isfile(opt_dict['db_file']):
+        RUNTIME_LOG.warning('Replacing database file "{path}"'.format(path=opt_dict['db_file']))
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.isfile(opt_dict['db_file'] + suffix):
+                os.remove(opt_dict['db_file'] + suffix)
+
+    ## Use a SQLite file for option --db - pages live on disk, so memory use
+    ##  stays bounded by the page cache and memory map budget, not the event
+    ##  count.  The file is new, skip reflection so the first connection is
+    ##  opened after the pragma listener is in place
+    store['db'] = dataset.connect('sqlite:///{path}'.format(path=opt_dict['db_file']), reflect_metadata=False)
+    event.listen(store['db'].engine, 'connect',
+                 lambda dbapi_con, con_record: set_db_pragma(dbapi_con, opt_dict['cache_mb']))
+    store['storage'] = store['db'].get_table('storage')
+    RUNTIME_LOG.debug('Connected dataset - file "{path}", cache {cache} MB'.format(path=opt_dict['db_file'],
+                                                                                    cache=opt_dict['cache_mb']))
+
+    return store
+
+
+def set_db_pragma(dbapi_con, cache_mb):
+    """ SET DATABASE PRAGMA function """
+    ## Tune every new connection to the database file
+    ##  WAL journaling with NORMAL sync - readers do not block the writer
+    ##  cache_size in KiB (negative) and mmap_size in bytes - the cache budget
+    ##  temp_store FILE - large sorts spill to disk, not memory
+    cursor = dbapi_con.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-{kib}'.format(kib=cache_mb * 1024))
+    cursor.execute('PRAGMA mmap_size={size}'.format(size=cache_mb * 1024 * 1024))
+    cursor.execute('PRAGMA temp_store=FILE')
+    cursor.close()
+
+
+def create_db(store, opt_dict):
+    """ CREATE DATABASE function """
+    ## Declare every storage column and its type - dataset would otherwise
+    ##  create them from the first insert, storing everything as text
+    import sqlalchemy
+
+    for col, col_type in STORAGE_SCHEMA:
+        if col not in store['storage'].columns:
+            store['storage'].create_column(col, getattr(sqlalchemy, col_type))
+    ## Enforce one row per event fingerprint
+    store['db'].executable.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_storage_{cols} ON storage ({col_list})'.format(
+        cols='_'.join(STORAGE_UNIQUE), col_list=','.join(STORAGE_UNIQUE)))
+
+    ## Dimension tables (id, value) and view storage_view - the storage
+    ##  columns with the DIM_FIELDS ids replaced by their values
+    for field in DIM_FIELDS:
+        store['dim'][field] = store['db'].get_table('dim_{field}'.format(field=field))
+        if 'value' not in store['dim'][field].columns:
+            store['dim'][field].create_column('value', sqlalchemy.UnicodeText)
+    store['db'].executable.execute('CREATE VIEW IF NOT EXISTS storage_view AS SELECT {cols} FROM storage {joins}'.format(
+        cols=', '.join('dim_{col}.value AS {col}'.format(col=col) if col in DIM_FIELDS else
+                       'storage.{col}'.format(col=col) for col in STORAGE_COLUMNS),
+        joins=' '.join('LEFT JOIN dim_{col} ON dim_{col}.id=storage.{col}'.format(col=col) for col in DIM_FIELDS)))
+
+    ## Side table of compressed raw lines - option --raw_store zlib
+    ##  inflate_raw is registered on the connection used for exports
+    if opt_dict['raw_store'] == 'zlib':
+        store['raw'] = store['db'].get_table('storage_raw')
+        for col, col_type in RAW_SCHEMA:
+            if col not in store['raw'].columns:
+                store['raw'].create_column(col, getattr(sqlalchemy, col_type))
+        store['db'].executable.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_storage_raw_fprint ON storage_raw (fprint)')
+        store['db'].executable.connection.create_function('inflate_raw', 1, inflate_raw)
+
+
+def insert_sample(store, opt_dict):
     """  INSERT SAMPLE function """
     ## Intialize db table with sample event(s)
     ##  Avoids missing category felds in sql queries
     ##  Provide built-in KB documentation in results
-    TBL_STORAGE.insert(
-        dict(category='iofails', date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
+    sample_list = []
+    sample_list.append(
+        dict(category='iofails', tstamp=0, date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
              fname='example.log', dev='naa.0123456789abcdef0123456789abcdef', dsname='ExampleDatastore',
-             world='vmkernel', cmd='0xff', t10='T10_XLATE', sense='H:GOOD D:GOOD P:GOOD',
+             world='vmkernel', cmd='0xff', t10='T10_XLATE', sense='H:0x0 D:0x0 P:0x0',
              asense='H:0x0 D:0x0 P:0x0 Valid sense data: 0x0 0x0 0x0',
              raw='VMW KB 289902: Interpreting SCSI sense codes in VMware ESXi and ESX, http://kb.vmware.com/kb/289902'))
-    TBL_STORAGE.insert(
-        dict(category='sioclmt', date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
+    sample_list.append(
+        dict(category='sioclmt', tstamp=0, date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
              fname='example.log', dev='naa.0123456789abcdef0123456789abcdef', dsname='ExampleDatastore',
              world='vmguest', cmd='0xff', t10='T10_XLATE',
              raw='VMW KB 1038241: Limiting disk I/O from a specific virtual machine, http://kb.vmware.com/kb/1038241'))
-    TBL_STORAGE.insert(
-        dict(category='latency', date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
+    sample_list.append(
+        dict(category='latency', tstamp=0, date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
              fname='example.log', dev='naa.0123456789abcdef0123456789abcdef', dsname='ExampleDatastore',
-             world='vmguest', latency='0', lavg='0',
+             world='vmguest', latency=0, lavg=0,
              raw='VMW KB 2007236: Storage device performance deteriorated, http://kb.vmware.com/kb/2007236'))
-    TBL_STORAGE.insert(
-        dict(category='apdpdls', date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
+    sample_list.append(
+        dict(category='apdpdls', tstamp=0, date='1970-01-01', hour='00', time='00:00:00.000Z', host='example.local',
              fname='example.log', dev='naa.0123456789abcdef0123456789abcdef', dsname='ExampleDatastore',
-             world='vmkernel', cmd='(ALL)', t10='(ALL)', latency='APD/PDL',
+             world='vmkernel', cmd='(ALL)', t10='(ALL)',
              raw='VMW KB 2004684: Permanent Device Loss (PDL) and All-Paths-Down (APD) in vSphere 5.x, http://kb.vmware.com/kb/2004684'))
 
+    ## Store the samples like events - fingerprint and raw line store
+    for rec in sample_list:
+        rec['fprint'] = hash_event(rec['host'], rec['raw'])
+    if opt_dict['raw_store'] == 'zlib':
+        pack_raw(sample_list)
+    insert_list(store, sample_list)
+
 
-def pop_db(path):
+def pop_db(store, opt_dict, stat_dict, path_list):
     """ POPULATE DATABASE function """
-    ## Assign pat_dns pattern for uname result - used to find ESXi hostname
-    ## Assign pat_txt pattern for vmkernel logs - used to find storage events
-    ## Assign pat_gzt pattern for compressed vmkernel logs - used to find storage events
-    ## Assign pat_dev pattern for vmfs to device mappings  - used to find datastore name
-    ## Assign pat_header for matching (and skipping) header
-    ## Assign pat_dir to optimize file checks by limiting paths - elimiate weird copies
-    pat_dict = {'dns': re.compile(r'^uname_-a.txt'),
-                'txt': re.compile(r'^(vmkernel|vobd)(\.log|\.[0-9]+(?!\.gz))'),
-                'gz': re.compile(r'^(vmkernel|vobd)\.[0-9]+\.gz'),
-                'vmfs': re.compile(r'^localcli_storage-vmfs-extent-list.txt'),
-                'header': re.compile(r'^Volume Name.*|^--*$'),
-                'subdir': re.compile(r'/(var|commands)/')}
-    ## Assign a default, empty hostnname
-    esxi_dict = {'bundle': '', 'uname': '', 'alt': ''}
-
-    ## Process the files in order (topdown) a single path (root, dirs, files)
+    ## Ingest pipeline - three stages connected by bounded queues, a full
+    ##  queue blocks the stage feeding it (backpressure)
+    ##  read  - thread, finds bundle files, reads and decompresses the logs
+    ##  parse - option --jobs worker processes, scan_block and insert_rec
+    ##  write - this process, dedup, Top Ten counts and batched inserts
+    ## Every task is numbered in read order and the writer handles results
+    ##  in that order, so the db is populated exactly like a serial run
+    bundle_list = []
+    for path in path_list:
+        bundle_list.extend(find_bundles(path))
+    RUNTIME_LOG.debug('Found vm-support bundles - count {count}, jobs {jobs}'.format(count=len(bundle_list),
+                                                                                    jobs=opt_dict['jobs']))
+    pipe_dict = {'task': multiprocessing.Queue(opt_dict['jobs'] * PIPE_DEPTH),
+                 'result': multiprocessing.Queue(opt_dict['jobs'] * PIPE_DEPTH),
+                 'seq': 0, 'error': None, 'start': time.time(),
+                 'busy': {'read': 0.0, 'parse': 0.0, 'write': 0.0},
+                 'depth': {'task': [0, 0, 0], 'result': [0, 0, 0]}}
+
+    worker_list = [multiprocessing.Process(target=parse_stage, args=(pipe_dict['task'], pipe_dict['result']))
+                   for worker in range(opt_dict['jobs'])]
+    for worker in worker_list:
+        worker.start()
+    ## The reader logs to the session logger too (SESSION_LOG)
+    reader = threading.Thread(target=contextvars.copy_context().run,
+                              args=(read_stage, opt_dict, bundle_list, pipe_dict, stat_dict))
+    reader.daemon = True
+    reader.start()
+
+    if write_stage(store, opt_dict, pipe_dict, stat_dict, worker_list):
+        reader.join()
+        for worker in worker_list:
+            worker.join()
+    else:
+        ## A parser died - stop the others and leave the reader, blocked on
+        ##  the full task queue, to exit with the process
+        RUNTIME_LOG.error('Failed ingest stage "{stage}" - worker exited'.format(stage='parse'))
+        for worker in worker_list:
+            worker.terminate()
+        pipe_dict['task'].cancel_join_thread()
+    if pipe_dict['error']:
+        raise pipe_dict['error']
+
+    ## Complete all writes to db - all ops are read from this point
+    store['db'].commit()
+
+    log_pipe(opt_dict, pipe_dict)
+    if opt_dict['cache_dir']:
+        RUNTIME_LOG.info('Parse cache "{path}" - hits {hit}, misses {miss}'.format(path=opt_dict['cache_dir'],
+                                                                                  hit=stat_dict['cache_hit'],
+                                                                                  miss=stat_dict['cache_miss']))
+    for host, count in sorted(stat_dict['dup_host'].items()):
+        RUNTIME_LOG.info('Skipped duplicate events - host "{host}", count {count}'.format(host=host, count=count))
+
+    return stat_dict
+
+
+def read_stage(opt_dict, bundle_list, pipe_dict, stat_dict):
+    """ READ STAGE function """
+    ## Reader thread - queues the parse tasks of every bundle in order, then
+    ##  one None per parser to stop it
+    ## An exception is kept for pop_db to raise once the parsers are done
+    start = time.time()
+    try:
+        for bundle_dict in bundle_list:
+            bundle_stat = read_bundle(bundle_dict, opt_dict, pipe_dict)
+            for key in bundle_stat:
+                stat_dict[key] += bundle_stat[key]
+    except Exception as error:  # pylint: disable=broad-except
+        RUNTIME_LOG.error('Failed ingest stage "{stage}" - {error}'.format(stage='read', error=error))
+        pipe_dict['error'] = error
+    finally:
+        for worker in range(opt_dict['jobs']):
+            put_task(pipe_dict, None)
+        pipe_dict['busy']['read'] += time.time() - start
+
+
+def put_task(pipe_dict, task):
+    """ PUT TASK function """
+    ## Number the task and queue it - time blocked on a full queue is taken
+    ##  off the reader busy time
+    if task is not None:
+        task['seq'] = pipe_dict['seq']
+        pipe_dict['seq'] += 1
+    sample_depth(pipe_dict['depth']['task'], pipe_dict['task'])
+    start = time.time()
+    pipe_dict['task'].put(task)
+    pipe_dict['busy']['read'] -= time.time() - start
+
+
+def sample_depth(depth, pipe_queue):
+    """ SAMPLE DEPTH function """
+    ## Queue depth statistics - [samples, sum of depths, maximum depth]
+    try:
+        size = pipe_queue.qsize()
+    except NotImplementedError:
+        ## macOS - no sem_getvalue, queue depths are not reported
+        return
+    depth[0] += 1
+    depth[1] += size
+    depth[2] = max(depth[2], size)
+
+
+def parse_stage(task_queue, result_queue):
+    """ PARSE STAGE function """
+    ## Parser worker process - parse tasks until None, then report the time
+    ##  spent parsing (not waiting on either queue)
+    busy = 0.0
+    for task in iter(task_queue.get, None):
+        start = time.time()
+        result = parse_task(task)
+        busy += time.time() - start
+        result_queue.put(result)
+    result_queue.put({'kind': 'done', 'busy': busy})
+
+
+def parse_task(task):
+    """ PARSE TASK function """
+    ## Scan one block or byte range of a log for events - cached events are
+    ##  queued as they are.  Markers ('cache', 'archive') pass through.
+    if task['kind'] == 'range':
+        msg_list = scan_range(task['range'] + (task['window'],))
+    elif task['kind'] == 'block':
+        msg_list = scan_block(task['block'], 0, len(task['block']), task['window'])
+    elif task['kind'] == 'msgs':
+        msg_list = task['msgs']
+    else:
+        return task
+
+    ## Archive members are scanned before their uname and vmfs extent files
+    ##  may be read - the writer adds the bundle fields (see write_result)
+    if task['esxi'] is None:
+        return {'seq': task['seq'], 'kind': 'member', 'member': task['member'], 'fname': task['fname'],
+                'msgs': msg_list}
+
+    ## Call function insert_rec - adds the hostname, file and datastore
+    ##  to each event
+    esxi_dict = dict(task['esxi'], rows=[])
+    for msg_dict in msg_list:
+        insert_rec(esxi_dict, msg_dict)
+    ## Compress raw lines here - in the parser process, with option
+    ##  --raw_store zlib
+    if esxi_dict['raw_store'] == 'zlib':
+        pack_raw(esxi_dict['rows'])
+
+    ## Events of a file missing from the parse cache are returned for it
+    return {'seq': task['seq'], 'kind': 'rows', 'rows': esxi_dict['rows'],
+            'msgs': msg_list if esxi_dict['cache'] else None}
+
+
+def write_stage(store, opt_dict, pipe_dict, stat_dict, worker_list):
+    """ WRITE STAGE function """
+    ## Writer - results arrive in any order from the parsers and are held
+    ##  until every earlier one is written
+    ## Returns False if a parser exited without finishing
+    write_dict = {'rows': [], 'cache': [], 'member': []}
+    pending = {}
+    next_seq = 0
+    done = 0
+    while done < len(worker_list):
+        try:
+            result = pipe_dict['result'].get(timeout=1)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in worker_list):
+                return False
+            continue
+        sample_depth(pipe_dict['depth']['result'], pipe_dict['result'])
+        if result['kind'] == 'done':
+            done += 1
+            pipe_dict['busy']['parse'] += result['busy']
+            continue
+
+        start = time.time()
+        pending[result['seq']] = result
+        while next_seq in pending:
+            write_result(store, opt_dict, stat_dict, write_dict, pending.pop(next_seq))
+            next_seq += 1
+        pipe_dict['busy']['write'] += time.time() - start
+
+    start = time.time()
+    insert_list(store, write_dict['rows'], opt_dict['flush_size'])
+    pipe_dict['busy']['write'] += time.time() - start
+
+    return True
+
+
+def write_result(store, opt_dict, stat_dict, write_dict, result):
+    """ WRITE RESULT function """
+    if result['kind'] == 'rows':
+        if result['msgs'] is not None:
+            write_dict['cache'].extend(result['msgs'])
+        write_rows(store, opt_dict, stat_dict, write_dict, result['rows'])
+    ## End of a file missing from the parse cache - all its events are in
+    elif result['kind'] == 'cache':
+        cache_put(result['esxi'], write_dict['cache'])
+        write_dict['cache'] = []
+    elif result['kind'] == 'member':
+        write_dict['member'].append((result['member'], result['fname'], result['msgs']))
+    ## End of an archive - its hostname and datastore map are known now
+    ##  logs are added in member name order, like an extracted bundle
+    elif result['kind'] == 'archive':
+        esxi_dict = dict(result['esxi'], rows=[])
+        for member_name, fname, msg_list in sorted(write_dict['member'], key=lambda member: member[0]):
+            esxi_dict['fname'] = fname
+            for msg_dict in msg_list:
+                insert_rec(esxi_dict, msg_dict)
+        if esxi_dict['raw_store'] == 'zlib':
+            pack_raw(esxi_dict['rows'])
+        write_dict['member'] = []
+        write_rows(store, opt_dict, stat_dict, write_dict, esxi_dict['rows'])
+
+
+def write_rows(store, opt_dict, stat_dict, write_dict, rec_list):
+    """ WRITE ROWS function """
+    ## Drop duplicates, count and buffer the events - the buffer is written
+    ##  to the db every option --flush_size records
+    rec_list = dedup_list(stat_dict, rec_list)
+    count_top_ten(stat_dict['top_ten'], rec_list)
+    write_dict['rows'].extend(rec_list)
+    if len(write_dict['rows']) >= opt_dict['flush_size']:
+        insert_list(store, write_dict['rows'], opt_dict['flush_size'])
+        write_dict['rows'] = []
+
+
+def log_pipe(opt_dict, pipe_dict):
+    """ LOG PIPELINE function """
+    ## Busy time of each stage against the ingest time, and the queue depths
+    ##  - a parse stage near 100% wants more --jobs, a full task queue with
+    ##  idle parsers points at the reader
+    elapsed = max(time.time() - pipe_dict['start'], 0.001)
+    for stage, workers in (('read', 1), ('parse', opt_dict['jobs']), ('write', 1)):
+        RUNTIME_LOG.info('Ingest stage "{stage}" - workers {workers}, busy {busy:.2f}s, utilization {util:.0%}'.format(
+            stage=stage, workers=workers, busy=pipe_dict['busy'][stage],
+            util=pipe_dict['busy'][stage] / (elapsed * workers)))
+    for name, depth in sorted(pipe_dict['depth'].items()):
+        if depth[0]:
+            RUNTIME_LOG.info('Ingest queue "{name}" - size {size}, depth mean {mean:.1f}, max {max}'.format(
+                name=name, size=opt_dict['jobs'] * PIPE_DEPTH, mean=depth[1] / depth[0], max=depth[2]))
+
+
+def find_bundles(path):
+    """ FIND BUNDLES function """
+    ## Find the bundle roots first - a directory holding commands/ or
+    ##  var/run/log/ is a bundle, only its BUNDLE_LAYOUT directories are
+    ##  listed (list_bundle) and nothing below it is walked
+    ## Other directories are searched for bundles and esx-*.tgz archives
     ##  Incl. symbolic links (important for automated extraction workarounds)
-    for root, dirs, files in os.walk(path, topdown=True, followlinks=True):
-        ## Check the number of '/'s (os.sep) against
-        ##  variable max_depth and truncate dirs if exceeded
-        if root.count(os.sep) >= 32:
-            del dirs[:]
+    pat_dict = PAT_FILE
+    bundle_list = []
+
+    ## A single vm-support archive - read directly by read_archive
+    if os.path.isfile(path):
+        if pat_dict['tgz'].search(path):
+            return [{'root': os.path.abspath(path), 'archive': True, 'files': []}]
+        RUNTIME_LOG.warning('Invalid vm-support bundle archive "{file}" - expected .tgz'.format(file=path))
+        return []
+
+    dir_list = [(os.path.abspath(path), 0)]
+    while dir_list:
+        dirpath, depth = dir_list.pop()
+        ## Check the depth below option --bundle_dir against 32 and skip
+        ##  the directory if exceeded (symlink loops)
+        if depth >= 32:
             RUNTIME_LOG.warning('Reached maximum directory depth - depth {depth}'.format(depth=32))
-        ## Process all the files - could use optimizing, meh
-        for fname in files:
-            esxi_dict['root'] = root
-            esxi_dict['fname'] = fname
-            esxi_dict = parse_file(esxi_dict, pat_dict)
+            continue
+        try:
+            entry_list = list(os.scandir(dirpath))
+        except OSError:
+            RUNTIME_LOG.warning('Failed directory read "{path}"'.format(path=dirpath))
+            continue
+
+        if any(os.path.isdir(os.path.join(dirpath, subdir)) for subdir, kinds in BUNDLE_LAYOUT):
+            bundle_dict = list_bundle(dirpath)
+            if bundle_dict['files']:
+                bundle_list.append(bundle_dict)
+            continue
+
+        for entry in entry_list:
+            if entry.is_dir():
+                dir_list.append((entry.path, depth + 1))
+            ## Check the archive is not a symlink - there should not be
+            ##  any symlinks, but it has happened and caused exceptions
+            elif entry.is_file(follow_symlinks=False) and pat_dict['tgz'].search(entry.name) and \
+                    pat_dict['esx'].search(entry.name):
+                bundle_list.append({'root': entry.path, 'archive': True, 'files': []})
+
+    ## Directory order depends on the filesystem - sort bundles so every
+    ##  run (serial or parallel) processes them in the same order
+    return sorted(bundle_list, key=lambda bundle_dict: bundle_dict['root'])
+
+
+def list_bundle(bundle_root):
+    """ LIST BUNDLE function """
+    ## Manifest of one extracted bundle - the uname, vmfs extent and log
+    ##  files of its BUNDLE_LAYOUT directories, sorted uname, vmfs, logs
+    file_dict = {'dns': [], 'vmfs': [], 'log': []}
+    for subdir, kinds in BUNDLE_LAYOUT:
+        dirpath = os.path.join(bundle_root, subdir)
+        if not os.path.isdir(dirpath):
+            continue
+        for entry in os.scandir(dirpath):
+            ## Check the file is not a symlink
+            ##  there should not be any symlinks,
+            ##  but it has happened and caused exceptions
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            for kind in kinds:
+                if PAT_FILE[kind].search(entry.name):
+                    file_dict['log' if kind in ('txt', 'gz') else kind].append((dirpath, entry.name, kind))
+                    break
+
+    bundle_dict = {'root': bundle_root, 'archive': False,
+                   'files': sorted(file_dict['dns']) + sorted(file_dict['vmfs']) + sorted(file_dict['log'])}
+    RUNTIME_LOG.debug('Found vm-support "{dirpath}" - files {count}'.format(dirpath=bundle_root,
+                                                                           count=len(bundle_dict['files'])))
+
+    return bundle_dict
+
+
+def read_bundle(bundle, opt_dict, pipe_dict):
+    """ READ BUNDLE function """
+    ## Assign a default, empty hostnname per bundle - the uname and vmfs
+    ##  extent files are read here, the logs are queued for the parsers
+    esxi_dict = {'bundle': '', 'uname': '', 'alt': '', 'cache_dir': opt_dict['cache_dir'],
+                 'stats': {'cache_hit': 0, 'cache_miss': 0},
+                 'raw_store': opt_dict['raw_store'], 'window': opt_dict['window'], 'cache': False,
+                 'inflate': opt_dict['inflate']}
+    pat_dict = {'header': re.compile(r'^Volume Name.*|^--*$')}
+
+    # Assign variable 'bundle' the vm-support directory name for later logging
+    esxi_dict['bundle'] = re.sub(r'^.*/esx-', 'esx-', bundle['root'].lower())
+    esxi_dict['bundle'] = re.sub(r'/.*$', '', esxi_dict['bundle'])
+    esxi_dict['alt'] = re.sub(r'.*(esx-.*-[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]--[0-9][0-9]\.[0-9][0-9]).*',
+                              r'\1', bundle['root'].lower())
+    esxi_dict['alt'] = re.sub(r'(esx-|-[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]--[0-9][0-9]\.[0-9][0-9])', '',
+                              esxi_dict['alt'])
+
+    if bundle['archive']:
+        esxi_dict = read_archive(esxi_dict, pat_dict, pipe_dict, bundle['root'])
+
+    for root, fname, kind in bundle['files']:
+        esxi_dict['root'] = root
+        esxi_dict['fname'] = fname
+        esxi_dict = parse_file(esxi_dict, pat_dict, pipe_dict, kind)
+
+    return esxi_dict['stats']
+
+
+def read_archive(esxi_dict, pat_dict, pipe_dict, archive):
+    """ READ ARCHIVE function """
+    ## Stream the .tgz once in member order - nothing is extracted to disk
+    ##  uname and vmfs extent files are kept as lines, logs are queued in
+    ##  blocks as they stream by and their events are kept by the writer
+    ##  until the hostname and datastore map are known (member order is not
+    ##  guaranteed)
+    member_dict = {'dns': [], 'vmfs': []}
+    ## With option --inflate zlib or pigz, the archive is decompressed by a
+    ##  child process and read as a plain tar stream
+    fileopen, inflate_proc = None, None
+    if esxi_dict['inflate'] in INFLATE_CMD:
+        fileopen, inflate_proc = open_gz(archive, esxi_dict['inflate'])
+    try:
+        if fileopen:
+            taropen = tarfile.open(fileobj=fileopen, mode='r|')
+        else:
+            taropen = tarfile.open(archive, 'r|*')
+        for member in taropen:
+            if not member.isfile():
+                continue
+            dirpath, fname = os.path.split(member.name)
+            for kind in ('dns', 'vmfs', 'txt', 'gz'):
+                if PAT_FILE[kind].search(fname) and PAT_FILE['member'][kind].search(dirpath):
+                    break
+            else:
+                continue
+            RUNTIME_LOG.debug('Processing vm-support "{dirpath}" - member "{file}"'.format(file=member.name,
+                                                                                           dirpath=esxi_dict['bundle']))
+            fileopen = taropen.extractfile(member)
+            if kind in ('dns', 'vmfs'):
+                line_list = fileopen.read().decode('utf-8', 'replace').splitlines()
+                member_dict[kind].append((member.name, line_list))
+                continue
+            if kind == 'gz':
+                fileopen = gzip.GzipFile(fileobj=fileopen, mode='rb')
+            for block in read_blocks(fileopen, esxi_dict['window']):
+                put_task(pipe_dict, {'kind': 'block', 'esxi': None, 'member': member.name, 'fname': fname,
+                                     'block': block, 'window': esxi_dict['window']})
+        taropen.close()
+    except (tarfile.TarError, IOError, EOFError, zlib.error):
+        RUNTIME_LOG.error('Failed vm-support archive read "{file}"'.format(file=archive))
+    if fileopen:
+        close_gz(fileopen, inflate_proc, archive)
+
+    ## Same order as an extracted bundle - uname, vmfs extents, then logs
+    for member_name, line_list in sorted(member_dict['dns']):
+        esxi_dict = parse_lines_dns(esxi_dict, line_list)
+    for member_name, line_list in sorted(member_dict['vmfs']):
+        esxi_dict = parse_lines_vmfs(esxi_dict, pat_dict, line_list)
+    if not esxi_dict['uname']:
+        esxi_dict['uname'] = esxi_dict['alt']
+    put_task(pipe_dict, {'kind': 'archive', 'esxi': task_esxi(esxi_dict)})
+
+    return esxi_dict
 
-    ## Complete all writes to db - all ops are read from this point
-    DB.commit()
 
+def task_esxi(esxi_dict):
+    """ TASK ESXI function """
+    ## Copy of the bundle fields for a queued task - the queue pickles it
+    ##  later, in its feeder thread, while the reader goes on
+    return dict((key, value) for key, value in esxi_dict.items() if key != 'stats')
 
-def parse_file(esxi_dict, pat_dict):
+
+def parse_file(esxi_dict, pat_dict, pipe_dict, kind):
     """ PARSE FILE function  """
-    ## Assign variable fullaname the file's full path name
-    ##  variable path already normalized,
-    ##  could use normalize again, but no problems found
-    ## Check variable fullname is not a symlink
-    ##  there should not be any symlinks,
-    ##  but it has happened and caused exceptions
-    ## The os.walk data is alphabetically sorted with topdown=True, and
-    ##  All directories at the same level are processed BEFORE the next
-    ##  level down. So ./commands is processed before ./var, and
-    ##  /etc/vmware is later than both because it is a deeper layer.
-    ##  All directories at the same level are processed BEFORE the next level down.
-    if (pat_dict['dns'].search(esxi_dict['fname']) or pat_dict['txt'].search(esxi_dict['fname']) or pat_dict[
-        'gz'].search(esxi_dict['fname']) or pat_dict['vmfs'].search(esxi_dict['fname'])) and pat_dict['subdir'].search(
-            os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname']))) and not os.path.islink(
-            os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname']))):
-        # Assign variable 'bundle' the vm-support directory name for later logging
-        esxi_dict['bundle'] = re.sub(r'^.*/esx-', 'esx-',
-                                     os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])).lower())
-        esxi_dict['bundle'] = re.sub(r'/.*$', '', esxi_dict['bundle'])
-        esxi_dict['alt'] = re.sub(r'.*(esx-.*-[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]--[0-9][0-9]\.[0-9][0-9]).*',
-                                  r'\1', os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])).lower())
-        esxi_dict['alt'] = re.sub(r'(esx-|-[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]--[0-9][0-9]\.[0-9][0-9])', '',
-                                  esxi_dict['alt'])
-
-        RUNTIME_LOG.debug('Processing vm-support "{dirpath}" - file "{file}"'.format(file=esxi_dict['fname'],
-                                                                                     dirpath=esxi_dict['bundle']))
-        ## Capture the ESXi hostname for logging
-        ##  with each event from this vm-support bundle
-        ## Check variable name mathes ./commands/uname_-a.txt
-        ##  using regex is overkill, but used for consistency
-        ##   with later vmkernel name matching that is required
-        if pat_dict['dns'].search(esxi_dict['fname']):
-            esxi_dict = parse_file_dns(esxi_dict)
-        ## Capture the datastore names and extents (storage devices)
-        ##  in dict 'esxi_dict' for logging with each event from this
-        ##  vm-support bundle
-        ## Check variable name mathes
-        ##  ./commands/localcli_storage-vmfs-extent-list.txt
-        ##  using regex is overkill, but used for consistency (again)
-        elif pat_dict['vmfs'].search(esxi_dict['fname']):
-            esxi_dict = parse_file_vmfs(esxi_dict, pat_dict)
-        ## Capture the events from ALL vmkernel logs
-        ##  (.log, .all, .[0-9] and .[0-9].gz)
-        elif pat_dict['txt'].search(esxi_dict['fname']):
-            parse_file_txt(esxi_dict)
-        elif pat_dict['gz'].search(esxi_dict['fname']):
-            parse_file_gz(esxi_dict)
+    RUNTIME_LOG.debug('Processing vm-support "{dirpath}" - file "{file}"'.format(file=esxi_dict['fname'],
+                                                                                 dirpath=esxi_dict['bundle']))
+    ## Capture the ESXi hostname for logging
+    ##  with each event from this vm-support bundle
+    ##  ./commands/uname_-a.txt is always processed first
+    if kind == 'dns':
+        esxi_dict = parse_file_dns(esxi_dict)
+    ## Capture the datastore names and extents (storage devices)
+    ##  in dict 'esxi_dict' for logging with each event from this
+    ##  vm-support bundle
+    ##  ./commands/localcli_storage-vmfs-extent-list.txt
+    elif kind == 'vmfs':
+        esxi_dict = parse_file_vmfs(esxi_dict, pat_dict)
+    ## Capture the events from ALL vmkernel logs
+    ##  (.log, .all, .[0-9] and .[0-9].gz)
+    ##  - read here, scanned by the parsers
+    elif kind in ('txt', 'gz'):
+        read_file_log(esxi_dict, pipe_dict, kind)
 
     return esxi_dict
 
@@ -481,11 +1417,18 @@ def parse_file_dns(esxi_dict):
     ## Open the file handle to read the file content
     ##  'with' automagically closes filehandle (neat)
     with open(os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])), "r") as fileopen:
-        for line in fileopen:
-            ## Check hostname attribute in uname_-a.txt
-            ##  do more error checking and logging to verify
-            if 'VMkernel ' in line:
-                esxi_dict['uname'] = re.sub(r'VMkernel | .*$', '', line.strip()).lower()
+        esxi_dict = parse_lines_dns(esxi_dict, fileopen)
+
+    return esxi_dict
+
+
+def parse_lines_dns(esxi_dict, line_iter):
+    """ PARSE LINES DNS function """
+    for line in line_iter:
+        ## Check hostname attribute in uname_-a.txt
+        ##  do more error checking and logging to verify
+        if 'VMkernel ' in line:
+            esxi_dict['uname'] = re.sub(r'VMkernel | .*$', '', line.strip()).lower()
     if not esxi_dict['uname']:
         RUNTIME_LOG.debug('Missing vm-support bundle "{dirpath}" uname file "{file} - using hostname "{host}"'.format(
             host=esxi_dict['alt'], dirpath=esxi_dict['bundle'], file='uname_-a.txt'))
@@ -497,165 +1440,644 @@ def parse_file_vmfs(esxi_dict, pat_dict):
     """ PARSE FILE VMFS function """
     ## Open the file handle to read the file content
     with open(os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])), "r") as fileopen:
-        for line in fileopen:
-            if not pat_dict['header'].search(line):
-                ## Check device (extent) and datastore listing
-                ##  use regex to capture dsnames with spaces
-                extent = re.sub(r'^.*  *[0-9a-f]*-[0-9a-f]*-[0-9a-f]*-[0-9a-f]*  *[0-9]  *|  *[0-9]  *$', '',
-                                line).strip()
-                datastore = re.sub(r'  *[0-9a-f]*-[0-9a-f]*-[0-9a-f]*-[0-9a-f]*  *[0-9]  *.*  *[0-9]  *$', '',
-                                   line).strip()
-                if extent and datastore:
-                    esxi_dict[extent] = datastore
-                else:
-                    RUNTIME_LOG.debug(
-                        'Missing information from vm-support "{dirpath}" - vmfs extent file "{file}'.format(
-                            dirpath=esxi_dict['bundle'], file='localcli_storage-vmfs-extent-list.txt'))
+        esxi_dict = parse_lines_vmfs(esxi_dict, pat_dict, fileopen)
+
     return esxi_dict
 
 
-def parse_file_txt(esxi_dict):
-    """ PARSE FILE TXT function """
-    # esxi_dict = parse_file_txt(esxi_dict, pat_dict)
+def parse_lines_vmfs(esxi_dict, pat_dict, line_iter):
+    """ PARSE LINES VMFS function """
+    for line in line_iter:
+        if not pat_dict['header'].search(line):
+            ## Check device (extent) and datastore listing
+            ##  use regex to capture dsnames with spaces
+            extent = re.sub(r'^.*  *[0-9a-f]*-[0-9a-f]*-[0-9a-f]*-[0-9a-f]*  *[0-9]  *|  *[0-9]  *$', '',
+                            line).strip()
+            datastore = re.sub(r'  *[0-9a-f]*-[0-9a-f]*-[0-9a-f]*-[0-9a-f]*  *[0-9]  *.*  *[0-9]  *$', '',
+                               line).strip()
+            if extent and datastore:
+                esxi_dict[extent] = datastore
+            else:
+                RUNTIME_LOG.debug(
+                    'Missing information from vm-support "{dirpath}" - vmfs extent file "{file}'.format(
+                        dirpath=esxi_dict['bundle'], file='localcli_storage-vmfs-extent-list.txt'))
+    return esxi_dict
+
+
+def read_file_log(esxi_dict, pipe_dict, kind):
+    """ READ FILE LOG function """
     ## Check variable hostname is assigned and use N/A if not
     ##  ./commands/uname_-a.txt missing or incomplete (weird)
     if not esxi_dict['uname']:
         esxi_dict['uname'] = esxi_dict['alt']
-    ## Open a read-only file handle
-    with open(os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])), "r") as fileopen:
-        for line in fileopen:
-            ## Call function insert_rec
-            ##  parses the hostname and line (logged event)
-            ##  into db fields and inserts
-            insert_rec(esxi_dict, line)
 
+    ## Reuse the events classified by an earlier run for an unchanged file
+    ##  the cache holds whole files - a time window filters cached events
+    ##  and its partial results are never cached
+    msg_list = cache_get(esxi_dict)
+    if msg_list is not None:
+        if esxi_dict['window']:
+            msg_list = [msg_dict for msg_dict in msg_list if esxi_dict['window'][0] <= '{date}T{time}'.format(
+                date=msg_dict['date'], time=msg_dict['time']) <= esxi_dict['window'][1]]
+        put_task(pipe_dict, {'kind': 'msgs', 'esxi': task_esxi(esxi_dict), 'msgs': msg_list})
+        return
+
+    esxi_dict['cache'] = bool(esxi_dict['cache_dir']) and not esxi_dict['window']
+    task_dict = task_esxi(esxi_dict)
+    esxi_dict['cache'] = False
+    fullname = os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname']))
+    if kind == 'gz':
+        ## Decompress (here or in a child process) and queue the log in blocks
+        fileopen, inflate_proc = open_gz(fullname, esxi_dict['inflate'])
+        try:
+            for block in read_blocks(fileopen, esxi_dict['window']):
+                put_task(pipe_dict, {'kind': 'block', 'esxi': task_dict, 'block': block,
+                                     'window': esxi_dict['window']})
+        finally:
+            close_gz(fileopen, inflate_proc, fullname)
+    else:
+        ## Queue byte ranges of the plain log - each parser maps the file
+        for first, last in read_ranges(fullname, esxi_dict['window']):
+            put_task(pipe_dict, {'kind': 'range', 'esxi': task_dict, 'range': (fullname, first, last),
+                                 'window': esxi_dict['window']})
+    if task_dict['cache']:
+        put_task(pipe_dict, {'kind': 'cache', 'esxi': task_dict})
+
+
+def open_gz(fullname, inflate):
+    """ OPEN GZIP function """
+    ## Decompressed stream of a gzip file and its child process (or None)
+    ##  option --inflate main - read with module gzip, in this process
+    ##  option --inflate zlib or pigz - read from the pipe of a child process
+    ##  decompressing the file, while the parsers scan the blocks already
+    ##  queued (the previous file, with the bounded task queue)
+    if inflate in INFLATE_CMD:
+        try:
+            inflate_proc = subprocess.Popen(INFLATE_CMD[inflate] + [fullname], stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL)
+            return inflate_proc.stdout, inflate_proc
+        except OSError:
+            RUNTIME_LOG.warning('Failed starting decompressor "{cmd}" - using main'.format(
+                cmd=INFLATE_CMD[inflate][0]))
+
+    return gzip.GzipFile(fullname, "rb"), None
 
-def parse_file_gz(esxi_dict):
-    """ PARSE FILE gz function """
-    ## Check variable hostname is assigned and use N/A if not
-    ## uname_-a.txt missing or incomplete (again, weird)
-    if not esxi_dict['uname']:
-        esxi_dict['uname'] = esxi_dict['alt']
-    ## Open a GZip read-only file handle
-    ##  unlike 'with' requires requesting close because GZip
-    fileopen = gzip.GzipFile(os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname'])), "r")
-    for line in fileopen:
-        ## Call function insert_rec - parses the hostname and
-        ##  line (logged event) into db fields and inserts
-        insert_rec(esxi_dict, str(line))
+
+def close_gz(fileopen, inflate_proc, fullname):
+    """ CLOSE GZIP function """
+    ## A child process stopped early by a time window dies on SIGPIPE - only
+    ##  an exit status (corrupt or truncated file) is logged
     fileopen.close()
+    if inflate_proc and inflate_proc.wait() > 0:
+        RUNTIME_LOG.warning('Failed decompressing "{file}" - exit status {status}'.format(
+            file=fullname, status=inflate_proc.returncode))
+
+
+def read_ranges(fullname, window=None):
+    """ READ RANGES function """
+    ## Newline-aligned byte ranges of a plain log, about READ_BLOCK bytes each
+    ##  - with a time window, of the lines inside it only (a file outside of
+    ##  it has none)
+    with open(fullname, "rb") as fileopen:
+        file_size = os.fstat(fileopen.fileno()).st_size
+        if file_size == 0:
+            return
+        filemap = mmap.mmap(fileopen.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            first, last = 0, file_size
+            if window:
+                first, last = window_range(filemap, window)
+                if first >= last:
+                    RUNTIME_LOG.debug('Skipping log "{file}" - outside time window'.format(file=fullname))
+                    return
+            range_list = split_ranges(filemap, (last - first) // READ_BLOCK + 1, first, last)
+        finally:
+            filemap.close()
+
+        for first, last in range_list:
+            ## Start reading each range from disk as it is queued - the I/O
+            ##  overlaps the scan of the ranges ahead of it
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fileopen.fileno(), first, last - first, os.POSIX_FADV_WILLNEED)
+            yield first, last
+
+
+def window_range(filemap, window):
+    """ WINDOW RANGE function """
+    ## Byte range of the lines inside the time window (since, until) - the
+    ##  first and last timestamps of the file rule it out entirely, else a
+    ##  binary search finds each end (logs are written in time order)
+    file_size = len(filemap)
+    head = first_tstamp(filemap, 0, file_size)
+    tail = final_tstamp(filemap, 0, file_size)
+    if head is None or tail < window[0] or head > window[1]:
+        return 0, 0
+
+    return seek_tstamp(filemap, 0, file_size, window[0], False), seek_tstamp(filemap, 0, file_size, window[1], True)
+
+
+def first_tstamp(block, first, last):
+    """ FIRST TIMESTAMP function """
+    ## Timestamp of the first line from first to last that starts with one
+    start = first
+    while start < last:
+        if PAT_TSTAMP.match(block, start, last):
+            return block[start:start + 24].decode('ascii')
+        start = block.find(b'\n', start, last) + 1
+        if start == 0:
+            break
+
+    return None
+
+
+def final_tstamp(block, first, last):
+    """ FINAL TIMESTAMP function """
+    ## Timestamp of the last line from first to last that starts with one
+    end = last
+    while end > first:
+        start = max(block.rfind(b'\n', first, end - 1) + 1, first)
+        if PAT_TSTAMP.match(block, start, last):
+            return block[start:start + 24].decode('ascii')
+        end = start
+
+    return None
+
+
+def seek_tstamp(block, first, last, tstamp, strict):
+    """ SEEK TIMESTAMP function """
+    ## Binary search for the start of the first line timestamped at or after
+    ##  tstamp (after, if strict) - last if there is none
+    low, high = first, last
+    while low < high:
+        middle = (low + high) // 2
+        found = first_tstamp(block, line_start(block, middle, first, last), last)
+        if found is None or found > tstamp or (found == tstamp and not strict):
+            high = middle
+        else:
+            low = middle + 1
+
+    return line_start(block, low, first, last)
+
+
+def line_start(block, offset, first, last):
+    """ LINE START function """
+    ## Start of the first line beginning at or after offset
+    if offset <= first:
+        return first
+    if block[offset - 1:offset] == b'\n':
+        return offset
+    end = block.find(b'\n', offset, last)
+
+    return last if end < 0 else end + 1
+
+
+def split_ranges(filemap, count, first=0, last=None):
+    """ SPLIT RANGES function """
+    ## Cut the buffer from first to last in count roughly equal byte ranges
+    ##  - each cut is moved past the next newline so no line spans two ranges
+    if last is None:
+        last = len(filemap)
+    bound_list = [first]
+    for index in range(1, count):
+        bound = filemap.find(b'\n', max(first + (last - first) * index // count, bound_list[-1]), last)
+        if bound < 0:
+            break
+        if bound + 1 > bound_list[-1]:
+            bound_list.append(bound + 1)
+    if bound_list[-1] < last:
+        bound_list.append(last)
+
+    return list(zip(bound_list[:-1], bound_list[1:]))
+
+
+def scan_range(range_tuple):
+    """ SCAN RANGE function """
+    ## Parser process - map the file again and scan one byte range of it
+    fullname, first, last, window = range_tuple
+    with open(fullname, "rb") as fileopen:
+        filemap = mmap.mmap(fileopen.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return scan_block(filemap, first, last, window)
+        finally:
+            filemap.close()
+
+
+def read_blocks(fileopen, window=None):
+    """ READ BLOCKS function """
+    ## Read a binary stream (gzip, archive member) a block at a time and
+    ##  yield it up to its last newline - the partial last line is carried
+    ##  over to the next block
+    ## With a time window, blocks ending before it are not yielded and the
+    ##  stream is not read (decompressed) past the first block after it
+    tail = b''
+    while True:
+        block = fileopen.read(READ_BLOCK)
+        if not block:
+            break
+        block = tail + block
+        split = block.rfind(b'\n') + 1
+        tail = block[split:]
+        if window:
+            head = first_tstamp(block, 0, split)
+            if head and head > window[1]:
+                return
+            final = final_tstamp(block, 0, split)
+            if final and final < window[0]:
+                continue
+        if split:
+            yield block[:split]
+    if tail:
+        yield tail
+
+
+def scan_block(block, first=0, last=None, window=None):
+    """ SCAN BLOCK function """
+    msg_list = []
+    if last is None:
+        last = len(block)
+    ## Search the buffer (bytes or mmap) from first to last for PAT_PREFILTER,
+    ##  recover the line around each match and resume after it - lines are
+    ##  classified in file order and a line holding several literals is found once
+    found = PAT_PREFILTER.search(block, first, last)
+    while found:
+        start = max(block.rfind(b'\n', first, found.start()) + 1, first)
+        end = block.find(b'\n', found.end(), last)
+        if end < 0:
+            end = last
+        ## Call function classify_rec - parses the decoded line (logged
+        ##  event) into db fields
+        msg_dict = classify_rec(block[start:end].decode('utf-8', 'replace'), window)
+        if msg_dict:
+            msg_list.append(msg_dict)
+        found = PAT_PREFILTER.search(block, end, last)
+
+    return msg_list
+
+
+def cache_get(esxi_dict):
+    """ PARSE CACHE GET function """
+    ## Parse cache layout in option --cache_dir
+    ##  stat/<key of version, path, size, mtime> holds the content key
+    ##  <content key>.json.gz holds the classified events of the file
+    ## An unchanged file is found by its stat key without reading it, a
+    ##  changed stat (copy, touch) falls back to hashing the content
+    if not esxi_dict['cache_dir']:
+        return None
+
+    fullname = os.path.abspath(os.path.join(esxi_dict['root'], esxi_dict['fname']))
+    file_stat = os.stat(fullname)
+    stat_key = hashlib.sha1('{ver}/{fmt}|{path}|{size}|{mtime}'.format(ver=__version__, fmt=CACHE_FORMAT,
+                                                                       path=fullname,
+                                                                       size=file_stat.st_size,
+                                                                       mtime=file_stat.st_mtime).encode('utf-8')).hexdigest()
+    esxi_dict['cache_stat'] = os.path.join(esxi_dict['cache_dir'], 'stat', stat_key)
+    esxi_dict['cache_key'] = ''
+
+    if os.path.isfile(esxi_dict['cache_stat']):
+        with open(esxi_dict['cache_stat'], 'r') as fileopen:
+            esxi_dict['cache_key'] = fileopen.read().strip()
+    if not esxi_dict['cache_key'] or not os.path.isfile(cache_file(esxi_dict)):
+        esxi_dict['cache_key'] = hash_file(fullname)
+
+    msg_list = None
+    if os.path.isfile(cache_file(esxi_dict)):
+        try:
+            with gzip.open(cache_file(esxi_dict), 'rb') as fileopen:
+                msg_list = json.loads(fileopen.read().decode('utf-8'))
+        except (IOError, ValueError):
+            RUNTIME_LOG.warning('Failed reading parse cache file "{path}"'.format(path=cache_file(esxi_dict)))
 
+    if msg_list is None:
+        esxi_dict['stats']['cache_miss'] += 1
+    else:
+        esxi_dict['stats']['cache_hit'] += 1
+        write_file_atomic(esxi_dict['cache_stat'], esxi_dict['cache_key'].encode('utf-8'))
+        RUNTIME_LOG.debug('Parse cache hit "{dirpath}" - file "{file}", events {count}'.format(
+            dirpath=esxi_dict['bundle'], file=esxi_dict['fname'], count=len(msg_list)))
 
-def insert_rec(esxi_dict, line):
-    """ INSERT DATABASE RECORD function """
-    pat_dict = {'datetime': re.compile(r'[0-9]{4}-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]\.[0-9]{3}Z'),
-                'latency': re.compile(r'performance has deteriorated'),
-                'dupvobd': re.compile(r'vob.scsi.device.io.latency.high'),
-                'iofails': re.compile(
-                    r'ScsiDeviceIO\: [0-9]+\: Cmd\(0x[0-9a-fA-F]+\) 0x[0-9a-fA-F][0-9a-fA-F], CmdSN 0x[0-9a-fA-F]+ from world [0-9]+ to dev .* failed .* sense data: '),
-                'iosmart': re.compile(r' Cmd\(0x[0-9a-fA-F]+\) 0x(1a|4d|85), '),
-                'sioclmt': re.compile(r'ScsiDeviceIO.* Restricting cmd .* from WID [0-9]+ to quiesced dev'),
-                'apdpdls': re.compile(r'ScsiDevice.* Device .* APD Notify PERM LOSS; token num:[0-9]+')}
-
-    if pat_dict['datetime'].match(line):
-        line = re.sub(r'"|\n|\r|$', '', line.strip())
-        msg_dict = {'date': line[0:10],
-                    'hour': line[11:13],
-                    'time': line[11:24]}
-        if pat_dict['apdpdls'].search(line):
-            # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device.c
-            msg_dict.update({'cat': 'apdpdls',
-                             'ext': re.sub(r'^.* Device | APD.*', '', line),
-                             'msec': 'APD/PDL',
-                             'world': 'vmkernel',
-                             'cmd': '(ALL)',
-                             't10': '(ALL)'})
-            msg_dict['dsn'] = esxi_dict.get(msg_dict['ext'], 'N/A')
-            # RUNTIME_LOG.debug('apdpdl -  msg "{msg}"'.format(msg=msg_dict))
-            try:
-                TBL_STORAGE.insert(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
-                                        date=msg_dict['date'], hour=msg_dict['hour'], time=msg_dict['time'],
-                                        world=msg_dict['world'], cmd=msg_dict['cmd'], t10=msg_dict['t10'],
-                                        dev=msg_dict['ext'], dsname=msg_dict['dsn'], latency=msg_dict['msec'],
-                                        raw=line))
-            except RuntimeError:
-                RUNTIME_LOG.warning('Failed creating record from message "{msg}[...]"'.format(msg=line[36:116]))
+    return msg_list
 
-        elif pat_dict['iofails'].search(line) and not pat_dict['iosmart'].search(line):
-            # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
-            world = re.sub(r'^.*CmdSN 0x[0-9a-fA-F]+ from world | to dev .*$', '', line)
-            if world == '0':
-                world = 'vmkernel'
-            else:
-                world = 'vmguest'
-
-            msg_dict.update({'cat': 'iofails',
-                             'cmd': re.sub(
-                                 r'^.* Cmd\(0x[0-9a-fA-F]+\) |, CmdSN 0x[0-9a-fA-F]+ from world [0-9]+ to dev .*$', '',
-                                 line),
-                             # 'world': re.sub(r'^.*CmdSN 0x[0-9a-fA-F]+ from world | to dev .*$', '', line),
-                             'world': world,
-                             'ext': re.sub(r'^.* to dev | failed .*$', '', line),
-                             'asense': re.sub(r'^.* failed |\.$', '', line)})
-            msg_dict.update({'t10': xlate_t10_cmd(msg_dict['cmd']),
-                             'dsn': esxi_dict.get(msg_dict['ext'], 'N/A'),
-                             'sense': xlate_t10_sense(re.sub(r' (Possible|Valid).*$', '', msg_dict['asense']))})
-            # RUNTIME_LOG.debug('iofails - msg "{msg}"'.format(msg=msg_dict))
-            try:
-                TBL_STORAGE.insert(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
-                                        date=msg_dict['date'], hour=msg_dict['hour'], time=msg_dict['time'],
-                                        cmd=msg_dict['cmd'], t10=msg_dict['t10'], world=msg_dict['world'],
-                                        dev=msg_dict['ext'], dsname=msg_dict['dsn'], sense=msg_dict['sense'],
-                                        asense=msg_dict['asense'], raw=line))
-            except RuntimeError:
-                RUNTIME_LOG.warning('Failed creating record from message "{msg}[...]"'.format(msg=line[36:116]))
-
-        elif pat_dict['latency'].search(line) and not pat_dict['dupvobd'].search(line):
-            # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
-            msg_dict.update({'cat': 'latency',
-                             'ext': re.sub(r'^.* Device | performance has deteriorated.*$', '', line),
-                             'msec': re.sub(r'^.* value of [0-9]+ microseconds to ', '', line),
-                             'mavg': re.sub(r'^.* value of | microseconds to [0-9]+.*$', '', line)})
-            msg_dict.update({'dsn': esxi_dict.get(msg_dict['ext'], 'N/A'),
-                             'msec': re.sub(r' .*', '', msg_dict['msec'])})
-            # RUNTIME_LOG.debug('latency - msg "{msg}"'.format(msg=msg_dict))
-            try:
-                TBL_STORAGE.insert(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
-                                        date=msg_dict['date'], hour=msg_dict['hour'], time=msg_dict['time'],
-                                        dev=msg_dict['ext'], dsname=msg_dict['dsn'], latency=msg_dict['msec'],
-                                        lavg=msg_dict['mavg'], raw=line))
-            except RuntimeError:
-                RUNTIME_LOG.warning('Failed creating record from message "{msg}[...]"'.format(msg=line[36:116]))
 
-        elif pat_dict['sioclmt'].search(line):
-            # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
-            world = re.sub(r'^.* from WID | to quiesced dev .*$', '', line)
-            if world == '0':
-                world = 'vmkernel'
-            else:
-                world = 'vmguest'
-
-            msg_dict.update({'cat': 'sioclmt',
-                             'cmd': re.sub(r'^.* Restricting cmd | \([0-9]+ bytes\) .*$', '', line),
-                             # 'world': re.sub(r'^.* from WID | to quiesced dev .*$', '', line),
-                             'world': world,
-                             'ext': re.sub(r'^.* to quiesced dev |:[0-9]+ \(vmkCmd=0x.*$', '', line)})
-            msg_dict.update({'t10': xlate_t10_cmd(msg_dict['cmd']),
-                             'dsn': esxi_dict.get(msg_dict['ext'], 'N/A')})
-            # RUNTIME_LOG.debug('sioclmt - msg "{msg}"'.format(msg=msg_dict))
-            try:
-                TBL_STORAGE.insert(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
-                                        date=msg_dict['date'], hour=msg_dict['hour'], time=msg_dict['time'],
-                                        cmd=msg_dict['cmd'], t10=msg_dict['t10'], world=msg_dict['world'],
-                                        dev=msg_dict['ext'], dsname=msg_dict['dsn'], raw=line))
-            except RuntimeError:
-                RUNTIME_LOG.warning('Failed creating record from message "{msg}[...]"'.format(msg=line[36:116]))
+def cache_put(esxi_dict, msg_list):
+    """ PARSE CACHE PUT function """
+    if not esxi_dict['cache_dir']:
+        return
+
+    try:
+        write_file_atomic(cache_file(esxi_dict), gzip.compress(json.dumps(msg_list).encode('utf-8')))
+        write_file_atomic(esxi_dict['cache_stat'], esxi_dict['cache_key'].encode('utf-8'))
+    except (IOError, OSError):
+        RUNTIME_LOG.warning('Failed writing parse cache file "{path}"'.format(path=cache_file(esxi_dict)))
+
+
+def cache_file(esxi_dict):
+    """ PARSE CACHE FILE function """
+    return os.path.join(esxi_dict['cache_dir'], '{key}.json.gz'.format(key=esxi_dict['cache_key']))
+
+
+def hash_file(fullname):
+    """ HASH FILE function """
+    ## Content key - the swingline version and cache format are included
+    ##  because cached events depend on the classification rules
+    file_hash = hashlib.sha1('{ver}/{fmt}'.format(ver=__version__, fmt=CACHE_FORMAT).encode('utf-8'))
+    with open(fullname, 'rb') as fileopen:
+        for block in iter(lambda: fileopen.read(1024 * 1024), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
 
 
-def check_db():
+def write_file_atomic(fullname, content):
+    """ WRITE FILE ATOMIC function """
+    ## Write a temporary file and rename it - worker processes may write
+    ##  the same cache entry at the same time
+    if not os.path.isdir(os.path.dirname(fullname)):
+        try:
+            os.makedirs(os.path.dirname(fullname))
+        except OSError:
+            pass
+    file_tmp = '{path}.{pid}.tmp'.format(path=fullname, pid=os.getpid())
+    with open(file_tmp, 'wb') as fileopen:
+        fileopen.write(content)
+    os.rename(file_tmp, fullname)
+
+
+def classify_rec(line, window=None):
+    """ CLASSIFY RECORD function """
+    ## Reject most lines with cheap literal checks before any regex runs
+    ##  - every category contains one of PAT_EVENT['prefilter']
+    for literal in PAT_EVENT['prefilter']:
+        if literal in line:
+            break
+    else:
+        return None
+
+    if not PAT_EVENT['datetime'].match(line):
+        return None
+    ## Time window check on the timestamp prefix - before any category regex
+    if window and not window[0] <= line[0:24] <= window[1]:
+        return None
+
+    line = line.strip().replace('"', '').replace('\r', '')
+    msg_dict = {'date': line[0:10],
+                'hour': line[11:13],
+                'time': line[11:24],
+                'tstamp': xlate_tstamp(line[0:10], line[11:24]),
+                'raw': line}
+
+    ## One match per category pulls out all fields - keep the category order
+    ##  and the iosmart and dupvobd exclusions
+    match = PAT_EVENT['apdpdls'].search(line)
+    if match:
+        # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device.c
+        msg_dict.update({'cat': 'apdpdls',
+                         'ext': match.group('dev'),
+                         'msec': None,
+                         'world': 'vmkernel',
+                         'cmd': '(ALL)',
+                         't10': '(ALL)'})
+        return msg_dict
+
+    match = PAT_EVENT['iofails'].search(line)
+    if match and not PAT_EVENT['iosmart'].search(line):
+        # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
+        msg_dict.update({'cat': 'iofails',
+                         'cmd': match.group('cmd'),
+                         'world': 'vmkernel' if match.group('world') == '0' else 'vmguest',
+                         'ext': match.group('dev'),
+                         'asense': match.group('asense')})
+        ## sense is kept as codes - decode_db names each distinct one after ingest
+        msg_dict.update({'t10': scsi_t10.xlate_t10_cmd(msg_dict['cmd']),
+                         'sense': match.group('sense')})
+        return msg_dict
+
+    match = PAT_EVENT['latency'].search(line)
+    if match and not PAT_EVENT['dupvobd'].search(line):
+        # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
+        msg_dict.update({'cat': 'latency',
+                         'ext': match.group('dev'),
+                         'msec': xlate_usec(match.group('latency')),
+                         'mavg': xlate_usec(match.group('lavg'))})
+        return msg_dict
+
+    match = PAT_EVENT['sioclmt'].search(line)
+    if match:
+        # From OpenGrok.eng.vmware.com xref: /vsphere60u1.perforce/vsphere60u1/vmkernel/storage/device/scsi_device_io.c
+        msg_dict.update({'cat': 'sioclmt',
+                         'cmd': match.group('cmd'),
+                         'world': 'vmkernel' if match.group('world') == '0' else 'vmguest',
+                         'ext': match.group('dev')})
+        msg_dict['t10'] = scsi_t10.xlate_t10_cmd(msg_dict['cmd'])
+        return msg_dict
+
+    return None
+
+
+def xlate_tstamp(date, time_txt):
+    """ TRANSLATE LOG TIMESTAMP TO EPOCH MICROSECONDS function """
+    ## date is YYYY-MM-DD and time_txt is HH:MM:SS.mmmZ - both from the
+    ##  timestamp prefix already checked by PAT_EVENT['datetime']
+    if date not in EPOCH_DATE:
+        EPOCH_DATE[date] = calendar.timegm(time.strptime(date, '%Y-%m-%d'))
+    return ((EPOCH_DATE[date] + int(time_txt[0:2]) * 3600 + int(time_txt[3:5]) * 60 + int(time_txt[6:8])) * 1000000 +
+            int(time_txt[9:12]) * 1000)
+
+
+def xlate_usec(usec):
+    """ TRANSLATE MICROSECONDS TEXT TO INTEGER function """
+    if usec and usec.isdigit():
+        return int(usec)
+    return None
+
+
+def insert_rec(esxi_dict, msg_dict):
+    """ INSERT DATABASE RECORD function """
+    msg_dict['dsn'] = esxi_dict.get(msg_dict['ext'], 'N/A')
+    line = msg_dict['raw']
+    fprint = hash_event(esxi_dict['uname'], line)
+    if msg_dict['cat'] == 'apdpdls':
+        # RUNTIME_LOG.debug('apdpdl -  msg "{msg}"'.format(msg=msg_dict))
+        esxi_dict['rows'].append(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
+                                      tstamp=msg_dict['tstamp'], date=msg_dict['date'], hour=msg_dict['hour'],
+                                      time=msg_dict['time'],
+                                      world=msg_dict['world'], cmd=msg_dict['cmd'], t10=msg_dict['t10'],
+                                      dev=msg_dict['ext'], dsname=msg_dict['dsn'], latency=msg_dict['msec'],
+                                      raw=line, fprint=fprint))
+    elif msg_dict['cat'] == 'iofails':
+        # RUNTIME_LOG.debug('iofails - msg "{msg}"'.format(msg=msg_dict))
+        esxi_dict['rows'].append(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
+                                      tstamp=msg_dict['tstamp'], date=msg_dict['date'], hour=msg_dict['hour'],
+                                      time=msg_dict['time'],
+                                      cmd=msg_dict['cmd'], t10=msg_dict['t10'], world=msg_dict['world'],
+                                      dev=msg_dict['ext'], dsname=msg_dict['dsn'], sense=msg_dict['sense'],
+                                      asense=msg_dict['asense'], raw=line, fprint=fprint))
+    elif msg_dict['cat'] == 'latency':
+        # RUNTIME_LOG.debug('latency - msg "{msg}"'.format(msg=msg_dict))
+        esxi_dict['rows'].append(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
+                                      tstamp=msg_dict['tstamp'], date=msg_dict['date'], hour=msg_dict['hour'],
+                                      time=msg_dict['time'],
+                                      dev=msg_dict['ext'], dsname=msg_dict['dsn'], latency=msg_dict['msec'],
+                                      lavg=msg_dict['mavg'], raw=line, fprint=fprint))
+    elif msg_dict['cat'] == 'sioclmt':
+        # RUNTIME_LOG.debug('sioclmt - msg "{msg}"'.format(msg=msg_dict))
+        esxi_dict['rows'].append(dict(category=msg_dict['cat'], host=esxi_dict['uname'], fname=esxi_dict['fname'],
+                                      tstamp=msg_dict['tstamp'], date=msg_dict['date'], hour=msg_dict['hour'],
+                                      time=msg_dict['time'],
+                                      cmd=msg_dict['cmd'], t10=msg_dict['t10'], world=msg_dict['world'],
+                                      dev=msg_dict['ext'], dsname=msg_dict['dsn'], raw=line, fprint=fprint))
+
+
+def hash_event(host, raw):
+    """ HASH EVENT function """
+    ## Event fingerprint - the first 64 bits of sha1(host, raw line) as a
+    ##  signed integer, compact enough for an INTEGER unique index
+    digest = hashlib.sha1('{host}\t{raw}'.format(host=host, raw=raw).encode('utf-8')).digest()
+
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+def pack_raw(rec_list):
+    """ PACK RAW function """
+    ## Move each raw line to zraw, zlib compressed - insert_list writes it
+    ##  to table storage_raw and leaves storage.raw NULL
+    for rec in rec_list:
+        rec['zraw'] = zlib.compress(rec['raw'].encode('utf-8'))
+        rec['raw'] = None
+
+
+def inflate_raw(zraw):
+    """ INFLATE RAW function """
+    ## SQL function inflate_raw - the raw line of a storage_raw row
+    if zraw is None:
+        return None
+
+    return zlib.decompress(zraw).decode('utf-8')
+
+
+def dedup_list(stat_dict, rec_list):
+    """ DEDUP RECORD LIST function """
+    ## Drop events already stored - the same line in an overlapping log
+    ##  (vmkernel.log and a rotated copy) or a second copy of a bundle
+    ## Skipped events are counted by host for the run summary
+    new_list = []
+    for rec in rec_list:
+        if rec['fprint'] in stat_dict['fprint']:
+            stat_dict['dup_host'][rec['host']] += 1
+            continue
+        stat_dict['fprint'].add(rec['fprint'])
+        new_list.append(rec)
+
+    return new_list
+
+
+def insert_list(store, rec_list, flush_size=5000):
+    """ INSERT RECORD LIST function """
+    ## Write records in batches of flush_size - one executemany per batch
+    ##  inside an explicit transaction, instead of a dataset insert (with its
+    ##  schema checks) per record.  Every row gets every column so the
+    ##  batch compiles to a single INSERT statement.
+    ## OR IGNORE - the fprint unique index backs up dedup_list
+    for start in range(0, len(rec_list), flush_size):
+        batch = [dict((col, rec.get(col)) for col in STORAGE_COLUMNS) for rec in
+                 rec_list[start:start + flush_size]]
+        ## Compressed raw lines (see pack_raw) go to table storage_raw
+        raw_batch = [dict((col, rec[col]) for col in RAW_COLUMNS) for rec in
+                     rec_list[start:start + flush_size] if rec.get('zraw') is not None]
+        ## DIM_FIELDS values are replaced by ids - new values are written to
+        ##  their dimension tables in the same transaction
+        dim_batch = encode_dim(store, batch)
+        store['db'].begin()
+        try:
+            for field in DIM_FIELDS:
+                if dim_batch[field]:
+                    store['db'].executable.execute(store['dim'][field].table.insert(), dim_batch[field])
+            store['db'].executable.execute(store['storage'].table.insert().prefix_with('OR IGNORE'), batch)
+            if raw_batch:
+                store['db'].executable.execute(store['raw'].table.insert().prefix_with('OR IGNORE'), raw_batch)
+            store['db'].commit()
+        except RuntimeError:
+            store['db'].rollback()
+            for field in DIM_FIELDS:
+                for dim_rec in dim_batch[field]:
+                    del store['dim_id'][field][dim_rec['value']]
+            RUNTIME_LOG.warning('Failed creating {count} records from message "{msg}[...]"'.format(
+                count=len(batch), msg=(batch[0]['raw'] or '')[36:116]))
+
+
+def encode_dim(store, batch):
+    """ ENCODE DIMENSION function """
+    ## Replace the DIM_FIELDS values of a batch with their ids, in place
+    ##  returns the new (id, value) records per column, NULL stays NULL
+    dim_batch = dict((field, []) for field in DIM_FIELDS)
+    for rec in batch:
+        for field in DIM_FIELDS:
+            value = rec[field]
+            if value is None:
+                continue
+            dim_key = store['dim_id'][field].get(value)
+            if dim_key is None:
+                dim_key = len(store['dim_id'][field]) + 1
+                store['dim_id'][field][value] = dim_key
+                dim_batch[field].append({'id': dim_key, 'value': value})
+            rec[field] = dim_key
+
+    return dim_batch
+
+
+def count_top_ten(top_ten, rec_list):
+    """ COUNT TOP TEN function """
+    ## Count the summary field values of stored events - one pass during
+    ##  ingest, the 1970-01-01 samples are never counted
+    for rec in rec_list:
+        if rec['date'] == '1970-01-01':
+            continue
+        cat_count = top_ten[rec['category']]
+        for field in SUMMARY_FIELDS[rec['category']]:
+            cat_count[field][rec.get(field)] += 1
+
+
+def decode_db(store, stat_dict):
+    """ DECODE DATABASE function """
+    ## Events are stored with SCSI sense codes - name each distinct code
+    ##  once (memoized scsi_t10.xlate_t10_sense) and rewrite dim_sense with
+    ##  a single UPDATE joined to a temporary code to name table
+    ## Codes named by an earlier ingest of the session are kept in
+    ##  store['sense_t10'] and not decoded again
+    code_list = [code for code in store['dim_id']['sense'] if code not in store['sense_t10']]
+    t10_list = [(code, scsi_t10.xlate_t10_sense(code)) for code in code_list]
+    store['db'].begin()
+    try:
+        store['db'].executable.execute('CREATE TEMP TABLE sense_t10 (code TEXT PRIMARY KEY, t10 TEXT)')
+        if t10_list:
+            store['db'].executable.execute('INSERT INTO sense_t10 (code, t10) VALUES (?, ?)', t10_list)
+        store['db'].executable.execute('UPDATE dim_sense SET value=(SELECT t10 FROM sense_t10 WHERE sense_t10.code=dim_sense.value) '
+                                       'WHERE value IN (SELECT code FROM sense_t10)')
+        store['db'].executable.execute('DROP TABLE sense_t10')
+        store['db'].commit()
+        store['sense_t10'].update(t10_list)
+    except RuntimeError:
+        store['db'].rollback()
+        RUNTIME_LOG.warning('Failed decoding dataset - table "{table}", values "{count}"'.format(table='dim_sense',
+                                                                                               count=len(t10_list)))
+
+    ## Top Ten counts were taken by code - recount them by name
+    sense_count = stat_dict['top_ten']['iofails']['sense']
+    t10_count = collections.Counter()
+    for code, count in sense_count.items():
+        t10_count[store['sense_t10'].get(code, code)] += count
+    stat_dict['top_ten']['iofails']['sense'] = t10_count
+    RUNTIME_LOG.debug('Decoded dataset - table "{table}", values "{count}", {cache}'.format(
+        table='dim_sense', count=len(t10_list), cache=scsi_t10.xlate_t10_sense.cache_info()))
+
+
+def check_db(store):
     """ CHECK DATABASE function """
-    for tbl_name in DB.tables:
-        tbl_len = len(DB[tbl_name])
+    ## Returns False if a table holds the samples only
+    for tbl_name in store['db'].tables:
+        ## Dimension tables hold distinct values only - not events
+        if tbl_name in ('dim_{field}'.format(field=field) for field in DIM_FIELDS):
+            continue
+        tbl_len = len(store['db'][tbl_name])
         if tbl_len > 4:
             RUNTIME_LOG.info(
                 'Captured dataset - table "{table}", records "{count}"'.format(table=tbl_name, count=tbl_len))
@@ -668,7 +2090,37 @@ def check_db():
             RUNTIME_LOG.info(
                 'Empty dataset situation 2 - ESXi vm-support bundle file or directory permissions (wrx on vm-bundle?)')
             RUNTIME_LOG.info('Empty dataset situation 3 - ESXi vm-support bundle file or directory match failed (bug?)')
-            sys.exit(1)
+            return False
+
+    return True
+
+
+def index_db(store):
+    """ INDEX DATABASE function """
+    ## Create indexes once all events are inserted - building an index is
+    ##  cheaper than maintaining it during ingest
+    for columns in STORAGE_INDEX:
+        try:
+            store['storage'].create_index(columns, name='ix_storage_{cols}'.format(cols='_'.join(columns)))
+        except RuntimeError:
+            RUNTIME_LOG.warning('Failed creating index - table "{table}", columns "{cols}"'.format(
+                table='storage', cols=','.join(columns)))
+    ## Collect index statistics for the query planner
+    store['db'].executable.execute('ANALYZE storage')
+    RUNTIME_LOG.debug('Indexed dataset - table "{table}", indexes "{count}"'.format(table='storage',
+                                                                                 count=len(STORAGE_INDEX)))
+
+
+def explain_query(store, sql_query):
+    """ EXPLAIN QUERY function """
+    ## Log how SQLite runs a report query (index use, temporary b-trees)
+    if RUNTIME_LOG.isEnabledFor(logging.DEBUG):
+        try:
+            plan = [record['detail'] for record in
+                    store['db'].query('EXPLAIN QUERY PLAN {qry}'.format(qry=sql_query))]
+            RUNTIME_LOG.debug('Query plan "{plan}" - SQL "{qry}"'.format(plan='; '.join(plan), qry=sql_query))
+        except RuntimeError:
+            RUNTIME_LOG.debug('Failed dataset query plan - SQL "{qry}"'.format(qry=sql_query))
 
 
 def relocate_file(file_src, file_dst):
@@ -699,179 +2151,259 @@ def relocate_file(file_src, file_dst):
         RUNTIME_LOG.error('Failed moving dataset freeze - temporary file "{tmp}", exists false'.format(tmp=file_src))
 
 
-def freeze_tbl(freeze_setup):
-    """ FREEZE DATABASE TABLE function """
-    freeze_format = freeze_setup['format']
-    freeze_export_file = freeze_setup['freeze_file']
-    sql_query = freeze_setup['sql_query']
+def field_keys(fields):
+    """ FIELD KEYS function """
+    ## Column names of a report field list (see set_sql) - the alias of
+    ##  each expression, ex. CASE ... END AS latency is latency
+    return [field.split(' AS ')[-1] for field in fields.split(',')]
 
-    # export all data into a single CSV or JSON
-    # NOTE: freeze_export_tmp has to be in CWD/PWD - dataset cannot handle full paths
-    freeze_export_tmp = os.path.basename(freeze_export_file)
 
-    result = []
+def freeze_rows(store, sql_query, writer_list):
+    """ FREEZE ROWS function """
+    ## One pass over the report query - each row is passed to every writer
+    ##  that takes rows, so the query runs once for all export formats
+    row_writers = [writer for writer in writer_list if writer['row']]
+    if not row_writers:
+        return
 
+    result = []
     try:
-        result = DB.query(sql_query)
+        ## Stream rows from the cursor - SQLite steps through the result
+        ##  one row at a time instead of materializing it
+        result = store['db'].executable.execute(sql_query)
     except RuntimeError:
-        RUNTIME_LOG.error('Failed dataset query "{qry}" for {fmt} query'.format(qry=sql_query, fmt=freeze_format))
+        RUNTIME_LOG.error('Failed dataset query "{qry}" for {fmt} query'.format(
+            qry=sql_query, fmt=','.join(writer['format'] for writer in row_writers)))
 
-    if result:
-        # RUNTIME_LOG.debug('Completed dataset {fmt} query - SQL "{qry}"'.format(qry=sql_query, fmt=freeze_format))
-        # NOTE: freeze_export_tmp has to be in CWD/PWD - dataset cannot handle full paths
-        dataset.freeze(result, format=freeze_format, filename=freeze_export_tmp)
-        relocate_file(freeze_export_tmp, freeze_export_file)
+    for record in result:
+        for writer in row_writers:
+            writer['row'](writer, record)
+
+
+def freeze_close(writer):
+    """ FREEZE CLOSE function """
+    ## Close the temporary file of a CSV, JSON or summary writer and move it
+    ##  to the report file
+    writer['handle'].close()
+    relocate_file(writer['tmp'], writer['file'])
+
+
+def freeze_csv(freeze_setup):
+    """ FREEZE CSV function """
+    ## CSV writer of the storage rows - header line, NULLs written empty
+    ##  (like dataset.freeze)
+    writer = {'format': 'csv', 'file': freeze_setup['opt_dict']['csv_file'],
+              'row': freeze_csv_row, 'close': freeze_close}
+    writer['tmp'] = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
+                                           file=os.path.basename(writer['file']))
+    writer['handle'] = open(writer['tmp'], 'w', encoding='utf8', newline='')
+    writer['csv'] = csv.writer(writer['handle'])
+    writer['csv'].writerow(field_keys(freeze_setup['cat_dict']['storage']))
+
+    return writer
+
+
+def freeze_csv_row(writer, record):
+    """ FREEZE CSV ROW function """
+    writer['csv'].writerow(['' if value is None else value for value in record])
+
+
+def freeze_json(freeze_setup):
+    """ FREEZE JSON function """
+    ## JSON writer of the storage rows - one object {count, results, meta},
+    ##  indented like dataset.freeze, written row by row instead of built in
+    ##  memory.  count is read from table storage up front
+    writer = {'format': 'json', 'file': freeze_setup['opt_dict']['json_file'],
+              'row': freeze_json_row, 'close': freeze_json_close, 'rows': 0,
+              'keys': field_keys(freeze_setup['cat_dict']['storage'])}
+    writer['tmp'] = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
+                                           file=os.path.basename(writer['file']))
+    writer['handle'] = open(writer['tmp'], 'w', encoding='utf8')
+    writer['handle'].write('{{\n  "count": {count},\n  "results": ['.format(
+        count=freeze_setup['store']['storage'].count()))
+
+    return writer
+
+
+def freeze_json_row(writer, record):
+    """ FREEZE JSON ROW function """
+    ## Each result object indented under "results"
+    writer['handle'].write(',\n    ' if writer['rows'] else '\n    ')
+    writer['handle'].write(json.dumps(dict(zip(writer['keys'], record)), indent=2).replace('\n', '\n    '))
+    writer['rows'] += 1
+
+
+def freeze_json_close(writer):
+    """ FREEZE JSON CLOSE function """
+    writer['handle'].write('\n  ],\n  "meta": {}\n}' if writer['rows'] else '],\n  "meta": {}\n}')
+    freeze_close(writer)
+
+
+def summary_model(stat_dict):
+    """ SUMMARY MODEL function """
+    ## Top Ten Summary of a session - a title and (heading, [(count, value)])
+    ##  sections, written as text by freeze_summary and as the XLSX summary
+    ##  worksheet by freeze_xlsx_summary
+    ## Values counted during ingest - ordered like SQL ORDER BY c DESC, value
+    ##  (NULL first) and limited to ten per field
+    section_list = []
+    for category, fields in SUMMARY_FIELDS.items():
+        for key in fields:
+            top_list = sorted(stat_dict['top_ten'][category][key].items(),
+                              key=lambda item: (-item[1], item[0] is not None, item[0]))[:10]
+            section_list.append(('{table} summary for {key}'.format(table=category, key=key),
+                                 [(count, value) for value, count in top_list]))
+
+    ## Duplicate events skipped during ingest - only when there were any
+    if stat_dict['dup_host']:
+        section_list.append(('duplicate summary for host',
+                             [(count, host) for host, count in sorted(stat_dict['dup_host'].items(),
+                                                                      key=lambda item: (-item[1], item[0]))]))
+
+    return {'title': 'Top Ten Summary for multiple vm-support bundles...', 'sections': section_list}
 
 
 def freeze_summary(freeze_setup):
     """ FREEZE TOP TEN SUMMARY RESULTS function """
-    freeze_export_file = freeze_setup['opt_dict']['summary_file']
-    sql_dict = freeze_setup['sql_dict']
-
-    freeze_export_file = os.path.abspath(freeze_export_file)
-    freeze_export_tmp = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
-                                               file=os.path.basename(freeze_export_file))
-
-    file_handle = open(freeze_export_tmp, 'w')
-    file_handle.write('Top Ten Summary for multiple vm-support bundles...')
-    pat_omitkey = re.compile(r'(id|raw|latency|lavg|time|asense)')
-
-    for category in ('iofails', 'sioclmt', 'latency', 'apdpdls'):
-        sql_query = sql_dict[category]
-        sql_query = sql_query + ' LIMIT 1'
-        sql_query = re.sub(r'time', 'hour', sql_query)
-        sql_query = re.sub(r'asense', 'sense', sql_query)
-
-        result = []
-        try:
-            result = DB.query(sql_query)
-            # RUNTIME_LOG.debug('Completed dataset {fmt} query - SQL "{qry}"'.format(qry=sql_query, fmt=freeze_format))
-        except RuntimeError:
-            RUNTIME_LOG.error('Failed dataset {fmt} query - SQL "{qry}"'.format(qry=sql_query, fmt='summary'))
-
-        key_list = {}
-        for record in result:
-            for key in record.keys():
-                key = re.sub(r'(^u\'|\'$)', '', str(key))
-                if not key in key_list:
-                    key_list[key] = ''
-
-        for key in key_list:
-            if not pat_omitkey.match(key):
-                result = []
-                sql_query = 'SELECT {field}, COUNT(*) c FROM {table} WHERE category=\'{cat}\' AND date<>\'1970-01-01\' GROUP BY {field} ORDER BY c DESC, {field} LIMIT 10'.format(
-                    field=key, cat=category, table='storage')
-
-                try:
-                    result = DB.query(sql_query)
-                except RuntimeError:
-                    RUNTIME_LOG.error(
-                        'Failed dataset query for top ten summary {field} values - SQL "{sql}"'.format(field=key,
-                                                                                                       sql=sql_query))
-                if result:
-                    file_handle.write('\n\n### {table} summary for {key} ###\n'.format(table=category, key=key))
-                    for record in result:
-                        value = record[key]
-                        count = record[u'c']
-                        file_handle.write('{c}\t{v}\n'.format(c=str(count).rjust(10), v=value))
-
-    file_handle.flush()  # <-- buffers write to disk for accurate size
-    # file_handle.closed
-
-    relocate_file(freeze_export_tmp, freeze_export_file)
-
-
-def freeze_xlsx_incl(workbook, freeze_incl_file):
-    """ FREEZE XLSX INCL function """
-    if os.path.isfile(freeze_incl_file):
-        format_summary = workbook.add_format({'num_format': '0', 'align': 'center'})
-        summarysheet = workbook.add_worksheet('summary')
-        summarysheet.set_column(0, 1, 50, format_summary)
-        # RUNTIME_LOG.debug('Importing into XLSX "{dst}" - worksheet "{sheet}", file "{src}"'.format(src=freeze_incl_file, sheet='summary', dst=freeze_export_file))
-        with open(freeze_incl_file, "r") as fileopen:
-            row = 0
-            pat_not_header = re.compile(r'\t')
-            for line in fileopen:
-                line = re.sub(r'^\t+', '', line.strip())
-                if pat_not_header.search(line):
-                    count = re.sub(r'\t.*$', '', line)
-                    if count.isdigit():
-                        count = int(count)
-                    summarysheet.write(row, 0, count)
-                    value = re.sub(r'^.*\t', '', line)
-                    # if value.isdigit():
-                    #    value = int(value)
-                    summarysheet.write(row, 1, value)
-                else:
-                    summarysheet.write(row, 0, line)
-                    # summarysheet.write(row, 1, line)
-                row += 1
+    ## Text writer of the summary model - no rows, written when opened
+    writer = {'format': 'summary', 'file': os.path.abspath(freeze_setup['opt_dict']['summary_file']),
+              'row': None, 'close': freeze_close}
+    writer['tmp'] = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
+                                           file=os.path.basename(writer['file']))
+
+    writer['handle'] = open(writer['tmp'], 'w')
+    writer['handle'].write(freeze_setup['summary']['title'])
+    for heading, top_list in freeze_setup['summary']['sections']:
+        writer['handle'].write('\n\n### {heading} ###\n'.format(heading=heading))
+        for count, value in top_list:
+            writer['handle'].write('{c}\t{v}\n'.format(c=str(count).rjust(10), v=value))
+
+    return writer
+
+
+def freeze_xlsx_summary(workbook, summary):
+    """ FREEZE XLSX SUMMARY function """
+    ## Summary worksheet from the summary model - the rows of the text file,
+    ##  one blank row after the title and two between sections
+    format_summary = workbook.add_format({'num_format': '0', 'align': 'center'})
+    summarysheet = workbook.add_worksheet('summary')
+    summarysheet.set_column(0, 1, 50, format_summary)
+    row = 0
+    summarysheet.write(row, 0, summary['title'])
+    for heading, top_list in summary['sections']:
+        row += 3 if row else 2
+        summarysheet.write(row, 0, '### {heading} ###'.format(heading=heading))
+        for count, value in top_list:
+            row += 1
+            summarysheet.write(row, 0, count)
+            summarysheet.write(row, 1, str(value))
 
 
 def freeze_xlsx(freeze_setup):
     """ FREEZE MICROSOFT EXCEL SPREADSHEET function """
-    freeze_export_tmp = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
-                                               file=os.path.basename(freeze_setup['opt_dict']['xlsx_file']))
-
-    workbook = xlsxwriter.Workbook(freeze_export_tmp)
+    import xlsxwriter
+
+    ## XLSX writer of the storage rows - each row goes to the worksheet of
+    ##  its category, with the fields of that category
+    writer = {'format': 'xlsx', 'file': freeze_setup['opt_dict']['xlsx_file'],
+              'row': freeze_xlsx_row, 'close': freeze_xlsx_close, 'sheets': {}}
+    writer['tmp'] = '{path}/{file}'.format(path=freeze_setup['opt_dict']['tmp_dir'],
+                                           file=os.path.basename(writer['file']))
+
+    ## constant_memory - each row is flushed to a temporary file once the
+    ##  next row is written, so memory does not grow with the event count
+    writer['workbook'] = xlsxwriter.Workbook(writer['tmp'], {'constant_memory': True})
+
+    if freeze_setup['summary']:
+        freeze_xlsx_summary(writer['workbook'], freeze_setup['summary'])
+
+    ## One worksheet per category - smaller sheets open faster in Excel
+    storage_keys = field_keys(freeze_setup['cat_dict']['storage'])
+    writer['category'] = storage_keys.index('category')
+    format_header = writer['workbook'].add_format({'bold': True, 'italic': True, 'underline': True})
+    for category in ('latency', 'iofails', 'sioclmt', 'apdpdls'):
+        key_list = field_keys(freeze_setup['cat_dict'][category])
+        wks_dict = {'sheet': 0, 'category': category, 'keys': key_list, 'format_header': format_header,
+                    'index': [storage_keys.index(key) for key in key_list],
+                    'length': dict((key, 0) for key in key_list), 'order': {}, 'alpha': 'A'}
+        for key in key_list:
+            wks_dict['order'][wks_dict['alpha']] = key
+            wks_dict['alpha'] = chr(ord(wks_dict['alpha']) + 1)
+        wks_dict['col_final'] = len(key_list) - 1
+        wks_dict['worksheet'] = freeze_xlsx_sheet_add(writer['workbook'], wks_dict)
+        writer['sheets'][category] = wks_dict
+
+    return writer
+
+
+def freeze_xlsx_row(writer, record):
+    """ FREEZE XLSX ROW function """
+    ## Write whole rows - integer columns (latency, lavg) arrive typed from
+    ##  the database and are written as numbers, NULLs are written as None
+    ## Roll over to a continuation worksheet at the Excel row limit
+    wks_dict = writer['sheets'][record[writer['category']]]
+    if wks_dict['row'] == XLSX_ROW_MAX:
+        ## Finish the full worksheet - autofilter, freeze pane and heatmap
+        freeze_xlsx_sheet_end(writer['workbook'], wks_dict)
+        wks_dict['worksheet'] = freeze_xlsx_sheet_add(writer['workbook'], wks_dict)
+
+    value_list = []
+    for key, index in zip(wks_dict['keys'], wks_dict['index']):
+        value = record[index]
+        if value is None:
+            value = 'None'
+        elif len(str(value)) > wks_dict['length'][key]:
+            wks_dict['length'][key] = len(str(value))
+        value_list.append(value)
+    wks_dict['worksheet'].write_row(wks_dict['row'], 0, value_list)
+    wks_dict['row'] += 1
+
+
+def freeze_xlsx_close(writer):
+    """ FREEZE XLSX CLOSE function """
+    for wks_dict in writer['sheets'].values():
+        freeze_xlsx_sheet_end(writer['workbook'], wks_dict)
+    writer['workbook'].close()
+
+    relocate_file(writer['tmp'], writer['file'])
+
+
+def freeze_xlsx_sheet_add(workbook, wks_dict):
+    """ FREEZE XLSX SHEET ADD function """
+    ## Start the next worksheet - latency, latency-2, latency-3, ...
+    ##  header row first, constant_memory rows must be written in order
+    wks_dict['sheet'] += 1
+    if wks_dict['sheet'] == 1:
+        worksheet = workbook.add_worksheet(wks_dict['category'])
+    else:
+        worksheet = workbook.add_worksheet('{cat}-{num}'.format(cat=wks_dict['category'], num=wks_dict['sheet']))
+        RUNTIME_LOG.info('Reached XLSX row limit - category "{cat}", continued on worksheet "{sheet}"'.format(
+            cat=wks_dict['category'], sheet=worksheet.get_name()))
+    worksheet.set_row(0, None, wks_dict['format_header'])
+    worksheet.write_row(0, 0, wks_dict['keys'])
+    wks_dict['row'] = 1
 
-    freeze_xlsx_incl(workbook, freeze_setup['opt_dict']['summary_file'])
+    return worksheet
 
-    worksheet = workbook.add_worksheet('event')
-    result = []
-    try:
-        result = DB.query(freeze_setup['sql_query'])
-        # RUNTIME_LOG.debug('Completed dataset {fmt} query - SQL "{qry}"'.format(qry=freeze_setup['sql_query'], fmt='xlsx'))
-    except RuntimeError:
-        RUNTIME_LOG.error('Failed dataset {fmt} query - SQL "{qry}"'.format(qry=freeze_setup['sql_query'], fmt='xlsx'))
-
-    # col_widths = {}
-    # col_order = {}
-    # row = 1
-    # col_chr = 'A'
-    # col_hdr = 0
-    wks_dict = {'row': 1, 'widths': {}, 'order': {}, 'alpha': 'A', 'hdr': 0}
-    for record in result:
-        col = 0
-        for key, value in record.items():
-            key = re.sub(r'(^u\'|\'$)', '', str(key))
-            value = re.sub(r'(^u\'|\'$)', '', str(value))
-            if not key in wks_dict['widths']:
-                wks_dict['order'][wks_dict['alpha']] = key
-                wks_dict['widths'][key] = 15
-                worksheet.write(0, wks_dict['hdr'], key)
-                wks_dict['alpha'] = chr(ord(wks_dict['alpha']) + 1)
-                wks_dict['hdr'] += 1
-            if wks_dict['widths'][key] < len(value):
-                wks_dict['widths'][key] = len(value) + 5
-            if ('latency' or 'lavg' or 'world' in key) and value.isdigit():
-                worksheet.write_number(wks_dict['row'], col, int(value))
-            else:
-                worksheet.write(wks_dict['row'], col, value)
-            col += 1
-        wks_dict['row'] += 1
 
+def freeze_xlsx_sheet_end(workbook, wks_dict):
+    """ FREEZE XLSX SHEET END function """
+    ## Column widths from the values written so far - the longest value plus
+    ##  padding, at least 15 characters
+    wks_dict['widths'] = dict((key, length + 5 if length > 15 else 15) for key, length in wks_dict['length'].items())
     wks_dict['row_final'] = wks_dict['row'] - 1
-    wks_dict['col_final'] = col - 1
-
-    freeze_xlsx_format({'workbook': workbook,
-                        'worksheet': worksheet,
-                        'wks_dict': wks_dict})
-    workbook.close()
-
-    relocate_file(freeze_export_tmp, freeze_setup['opt_dict']['xlsx_file'])
+    freeze_xlsx_format({'workbook': workbook, 'worksheet': wks_dict['worksheet'], 'wks_dict': wks_dict})
 
 
 def freeze_xlsx_format(format_setup):
     """ FREEZE XLSX FORMAT function """
-    format_header = format_setup['workbook'].add_format({'bold': True, 'italic': True, 'underline': True})
     format_date = format_setup['workbook'].add_format({'num_format': 'yyyy-mm-dd'})
     format_number = format_setup['workbook'].add_format({'num_format': '0'})
     format_apdpdls = format_setup['workbook'].add_format({'bg_color': '#FF0000'})
     format_txtnone = format_setup['workbook'].add_format({'fg_color': '#808080', 'bg_color': '#D3D3D3'})
 
-    format_setup['worksheet'].set_row(0, None, format_header)
     # Format column format_setup['wks_dict']['widths'] for date,time,host,dev,latency,raw
+    tag_heatmap = None
     for key in format_setup['wks_dict']['order'].keys():
         if 'date' in format_setup['wks_dict']['order'][key]:
             alpha = '{alpha}:{alpha}'.format(alpha=key)
@@ -892,7 +2424,9 @@ def freeze_xlsx_format(format_setup):
                                          format_setup['wks_dict']['col_final'])
     ## Freeze top row with headers and autofilter
     format_setup['worksheet'].freeze_panes(1, 0)
-    ## Format conditional fomatting
+    ## Format conditional fomatting - worksheets with a latency column
+    if not tag_heatmap:
+        return
     fm_cond_range = '{col}2:{col}{row}'.format(col=tag_heatmap, row=format_setup['wks_dict']['row_final'] + 1)
     format_setup['worksheet'].conditional_format(fm_cond_range,
                                                  {'type': '3_color_scale',
@@ -925,253 +2459,6 @@ def milton_waddams():
     RUNTIME_LOG.debug('Excuse me, I believe you have my stapler...')
 
 
-def xlate_t10_cmd(cmd_hex):
-    """" TRANSLATE SCSI COMMAND HEXT CODES TO T10 HUMAN READABLE function """
-    ## See references at:
-    ##    http://www.vmware.com/files/pdf/techpaper/VMware-vSphere-Storage-API-Array-Integration.pdf
-    ##    www.t10.org/lists/op-num.htm
-
-    t10_dict = {"0x00": "TEST_UNIT_READY",
-                "0x01": "REWIND/REZERO_UNIT_[SBC]",
-                "0x02": "T10_UNSPECIFIED",
-                "0x03": "REQUEST_SENSE",
-                "0x04": "FORMAT_MEDIUM/FORMAT_UNIT/FORMAT",
-                "0x05": "READ_BLOCK_LIMITS",
-                "0x06": "T10_UNSPECIFIED",
-                "0x07": "INITIALIZE_ELEMENT_STATUS/REASSIGN_BLOCKS",
-                "0x08": "GET_MESSAGE/READ/RECEIVE",
-                "0x09": "T10_UNSPECIFIED",
-                "0x0a": "PRINT/SEND_MESSAGE/SEND/WRITE",
-                "0x0b": "SEEK_[SBC]/SET_CAPACITY/SLEW_AND_PRINT",
-                "0x0c": "T10_UNSPECIFIED",
-                "0x0d": "T10_UNSPECIFIED",
-                "0x0e": "T10_UNSPECIFIED",
-                "0x0f": "READ_REVERSE",
-                "0x10": "SYNCHRONIZE_BUFFER/WRITE_FILEMARKS",
-                "0x11": "SPACE",
-                "0x12": "INQUIRY",
-                "0x13": "VERIFY",
-                "0x14": "RECOVER_BUFFERED_DATA",
-                "0x15": "MODE_SELECT",
-                "0x16": "RESERVE_ELEMENT_[SMC]/RESERVE_[SPC-2]",
-                "0x17": "RELEASE_ELEMENT_[SMC]/RELEASE_[SPC-2]",
-                "0x18": "COPY_[SPC]",
-                "0x19": "ERASE",
-                "0x1a": "MODE_SENSE/[ignore_S.M.A.R.T.]",
-                "0x1b": "LOAD_UNLOAD/OPEN/CLOSE_IMPORT/EXPORT_ELEMENT/SCAN/START_STOP_UNIT/STOP_PRINT",
-                "0x1c": "RECEIVE_DIAGNOSTIC_RESULTS",
-                "0x1d": "SEND_DIAGNOSTIC",
-                "0x1e": "PREVENT_ALLOW_MEDIUM_REMOVAL",
-                "0x1f": "T10_UNSPECIFIED",
-                "0x20": "T10_UNSPECIFIED",
-                "0x21": "T10_UNSPECIFIED",
-                "0x22": "T10_UNSPECIFIED",
-                "0x23": "READ_FORMAT_CAPACITIES",
-                "0x24": "SET_WINDOW",
-                "0x25": "GET_WINDOW/READ_CAPACITY/READ_CAPACITY/READ_CARD_CAPACITY",
-                "0x26": "T10_UNSPECIFIED",
-                "0x27": "T10_UNSPECIFIED",
-                "0x28": "GET_MESSAGE/READ",
-                "0x29": "READ_GENERATION",
-                "0x2a": "SEND_MESSAGE/SEND/WRITE",
-                "0x2b": "LOCATE/POSITION_TO_ELEMENT/SEEK_[SBC]",
-                "0x2c": "ERASE",
-                "0x2d": "READ_UPDATED_BLOCK",
-                "0x2e": "WRITE_AND_VERIFY",
-                "0x2f": "VERIFY",
-                "0x30": "SEARCH_DATA_HIGH_[SBC]",
-                "0x31": "OBJECT_POSITION/SEARCH_DATA_EQUAL_[SBC]",
-                "0x32": "SEARCH_DATA_LOW_[SBC]",
-                "0x33": "SET_LIMITS_[SBC]",
-                "0x34": "GET_DATA_BUFFER_STATUS/PRE-FETCH/READ_POSITION",
-                "0x35": "SYNCHRONIZE_CACHE",
-                "0x36": "LOCK_UNLOCK_CACHE_[SBC]",
-                "0x37": "INITIALIZE_ELEMENT_STATUS_WITH_RANGE/READ_DEFECT_DATA",
-                "0x38": "MEDIUM_SCAN",
-                "0x39": "COMPARE_[SPC]",
-                "0x3a": "COPY_AND_VERIFY_[SPC]",
-                "0x3b": "WRITE_BUFFER",
-                "0x3c": "READ_BUFFER",
-                "0x3d": "UPDATE_BLOCK",
-                "0x3e": "READ_LONG",
-                "0x3f": "WRITE_LONG",
-                "0x40": "CHANGE_DEFINITION_[SPC]",
-                "0x41": "WRITE_SAME",
-                "0x42": "READ_SUB-CHANNEL/UNMAP_(VAAI)",
-                "0x43": "READ_TOC/PMA/ATIP",
-                "0x44": "READ_HEADER/REPORT_DENSITY_SUPPORT",
-                "0x45": "PLAY_AUDIO",
-                "0x46": "GET_CONFIGURATION",
-                "0x47": "PLAY_AUDIO_MSF",
-                "0x48": "SANITIZE",
-                "0x49": "T10_UNSPECIFIED",
-                "0x4a": "GET_EVENT_STATUS_NOTIFICATION",
-                "0x4b": "PAUSE/RESUME",
-                "0x4c": "LOG_SELECT",
-                "0x4d": "LOG_SENSE/[ignore_S.M.A.R.T.]",
-                "0x4e": "STOP_PLAY/SCAN",
-                "0x4f": "T10_UNSPECIFIED",
-                "0x50": "XDWRITE_[SBC-2]",
-                "0x51": "READ_DISC_INFORMATION/XPWRITE",
-                "0x52": "READ_TRACK_INFORMATION/XDREAD_[SBC-2]",
-                "0x53": "RESERVE_TRACK/XDWRITEREAD",
-                "0x54": "SEND_OPC_INFORMATION",
-                "0x55": "MODE_SELECT",
-                "0x56": "RESERVE_ELEMENT_[SMC]/RESERVE_[SPC-2]",
-                "0x57": "RELEASE_ELEMENT_[SMC]/RELEASE_[SPC-2]",
-                "0x58": "REPAIR_TRACK",
-                "0x59": "T10_UNSPECIFIED",
-                "0x5a": "MODE_SENSE",
-                "0x5b": "CLOSE_TRACK/SESSION",
-                "0x5c": "READ_BUFFER_CAPACITY",
-                "0x5d": "SEND_CUE_SHEET",
-                "0x5e": "PERSISTENT_RESERVE_IN",
-                "0x5f": "PERSISTENT_RESERVE_OUT",
-                "0x7e": "extended_CDB",
-                "0x7f": "variable_length_CDB_(more_than_16_bytes)",
-                "0x80": "WRITE_FILEMARKS/XDWRITE_EXTENDED_[SBC]",
-                "0x81": "READ_REVERSE/REBUILD_[SBC]",
-                "0x82": "ALLOW_OVERWRITE/REGENERATE_[SBC]",
-                "0x83": "Third-party_Copy_OUT_(VAAI_XCopy)",
-                "0x84": "Third-party_Copy_IN",
-                "0x85": "ATA_PASS-THROUGH/[ignore_S.M.A.R.T.]",
-                "0x86": "ACCESS_CONTROL_IN",
-                "0x87": "ACCESS_CONTROL_OUT",
-                "0x88": "READ",
-                "0x89": "COMPARE_AND_WRITE_(VAAI_ATS)",
-                "0x8a": "WRITE",
-                "0x8b": "ORWRITE",
-                "0x8c": "READ_ATTRIBUTE",
-                "0x8d": "WRITE_ATTRIBUTE",
-                "0x8e": "WRITE_AND_VERIFY",
-                "0x8f": "VERIFY",
-                "0x90": "PRE-FETCH",
-                "0x91": "SPACE/SYNCHRONIZE_CACHE",
-                "0x92": "LOCATE/LOCK_UNLOCK_CACHE_[SBC]",
-                "0x93": "ERASE/WRITE_SAME_(VAAI_Zero)",
-                "0x94": "SCSI_Socket_Services_project",
-                "0x95": "SCSI_Socket_Services_project",
-                "0x96": "SCSI_Socket_Services_project",
-                "0x97": "SCSI_Socket_Services_project",
-                "0x98": "T10_UNSPECIFIED",
-                "0x99": "T10_UNSPECIFIED",
-                "0x9a": "T10_UNSPECIFIED",
-                "0x9b": "T10_UNSPECIFIED",
-                "0x9c": "WRITE_ATOMIC",
-                "0x9d": "SERVICE_ACTION_BIDIRECTIONAL",
-                "0x9e": "SERVICE_ACTION_IN",
-                "0x9f": "SERVICE_ACTION_OUT",
-                "0xa0": "REPORT_LUNS",
-                "0xa1": "ATA_PASS-THROUGH/BLANK",
-                "0xa2": "SECURITY_PROTOCOL_IN",
-                "0xa3": "MAINTENANCE_IN/SEND_KEY",
-                "0xa4": "MAINTENANCE_OUT/REPORT_KEY",
-                "0xa5": "MOVE_MEDIUM_[SMC-2]/PLAY_AUDIO",
-                "0xa6": "EXCHANGE_MEDIUM/LOAD/UNLOAD_C/DVD",
-                "0xa7": "MOVE_MEDIUM_ATTACHED_[SMC-2]/SET_READ_AHEAD",
-                "0xa8": "GET_MESSAGE/READ",
-                "0xa9": "SERVICE_ACTION_OUT",
-                "0xaa": "SEND_MESSAGE/WRITE",
-                "0xab": "SERVICE_ACTION_IN",
-                "0xac": "ERASE/GET_PERFORMANCE",
-                "0xad": "READ_DVD_STRUCTURE",
-                "0xae": "WRITE_AND_VERIFY",
-                "0xaf": "VERIFY",
-                "0xb0": "SEARCH_DATA_HIGH_[SBC]",
-                "0xb1": "SEARCH_DATA_EQUAL_[SBC]",
-                "0xb2": "SEARCH_DATA_LOW_[SBC]",
-                "0xb3": "SET_LIMITS_[SBC]",
-                "0xb4": "READ_ELEMENT_STATUS_ATTACHED_[SMC-2]",
-                "0xb5": "REQUEST_VOLUME_ELEMENT_ADDRESS/SECURITY_PROTOCOL_OUT",
-                "0xb6": "SEND_VOLUME_TAG/SET_STREAMING",
-                "0xb7": "READ_DEFECT_DATA",
-                "0xb8": "READ_ELEMENT_STATUS_[SMC-2]",
-                "0xb9": "READ_CD_MSF",
-                "0xba": "REDUNDANCY_GROUP_(IN)/SCAN",
-                "0xbb": "REDUNDANCY_GROUP_(OUT)/SET_CD_SPEED",
-                "0xbc": "SPARE_(IN)",
-                "0xbd": "MECHANISM_STATUS/SPARE_(OUT)",
-                "0xbe": "READ_CD/VOLUME_SET_(IN)",
-                "0xbf": "SEND_DVD_STRUCTURE/VOLUME_SET_(OUT)",
-                "0xfe": "Third-party_GENERIC_(VAAI_ATS)"}
-
-    try:
-        cmd_t10 = t10_dict[cmd_hex]
-        return cmd_t10
-    except RuntimeError:
-        RUNTIME_LOG.debug('Failed translating SCSI hexadecimal command "{cmd}" to T10 name'.format(cmd=cmd_hex))
-        return "T10_UNSPECIFIED"
-
-
-def xlate_t10_sense(sense):
-    """ TRANSLATE SCSI SENSE HEX CODES TO T10 HUMAN READABLE function """
-    ## See references at:
-    ##    https://gsstools.vmware.com/tools/scsi-decoder/
-    ##    http://kb.vmware.com/kb/289902
-
-    sense_low = sense.lower()
-    pat_hex = re.compile(r'0x[0-9a-fA-F]+')
-    h_sense = re.sub(r'^h:', '', sense_low)
-    h_sense = re.sub(r' .*', '', h_sense)
-    d_sense = re.sub(r'^.*d:', '', sense_low)
-    d_sense = re.sub(r' .*', '', d_sense)
-    p_sense = re.sub(r'^.*p:', '', sense_low)
-    p_sense = re.sub(r' .*', '', p_sense)
-
-    if pat_hex.match(h_sense) and pat_hex.match(d_sense) and pat_hex.match(p_sense):
-        h_dict = {"0x0": "GOOD",
-                  "0x1": "NO_CONNECT",
-                  "0x2": "BUS_BUSY",
-                  "0x3": "TIME_OUT",
-                  "0x4": "BAD_TARGET",
-                  "0x5": "ABORT",
-                  "0x6": "PARITY",
-                  "0x7": "ERROR",
-                  "0x8": "RESET",
-                  "0x9": "BAD_INTR",
-                  "0xa": "PASSTHROUGH",
-                  "0xb": "SOFT_ERROR",
-                  "0xc": "IMM_RETRY",
-                  "0xd": "REQUEUE"}
-
-        d_dict = {"0x0": "GOOD",
-                  "0x2": "CHECK_CONDITION",
-                  "0x4": "CONDITION_MET",
-                  "0x8": "BUSY",
-                  "0x10": "INTERMEDIATE",
-                  "0x14": "INTERMEDIATE-CONDITION_MET",
-                  "0x18": "RESERVATION_CONFLICT",
-                  "0x22": "Obsolete",
-                  "0x28": "TASK_SET_FULL",
-                  "0x30": "ACA_ACTIVE",
-                  "0x40": "TASK_ABORTED"}
-
-        p_dict = {"0x0": "GOOD",
-                  "0x1": "TRANSIENT",
-                  "0x2": "SNAPSHOT",
-                  "0x3": "RESERVATION_LOST",
-                  "0x4": "REQUEUE",
-                  "0x5": "ATS_MISCOMPARE",
-                  "0x6": "THINPROV_BUSY_GROWING",
-                  "0x7": "THINPROV_ATQUOTA",
-                  "0x8": "THINPROV_NOSPACE"}
-
-        try:
-            h_t10 = h_dict[h_sense]
-            d_t10 = d_dict[d_sense]
-            p_t10 = p_dict[p_sense]
-            hdp_t10 = "H:{h} D:{d} P:{p}".format(h=h_t10, d=d_t10, p=p_t10)
-            return hdp_t10
-        except RuntimeError:
-            RUNTIME_LOG.warning('Failed translating SCSI sense code "{sense}" to T10 names'.format(sense=sense))
-            return sense
-    else:
-        RUNTIME_LOG.warning(
-            'Failed translating sense codes to T10 text - sense "H:{h} D:{d} P:{p}"'.format(h=h_sense, d=d_sense,
-                                                                                            p=p_sense))
-        return sense
-
-
 if __name__ == '__main__':
     main()
 